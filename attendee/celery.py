@@ -6,16 +6,17 @@ from celery import Celery
 # Set the default Django settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "attendee.settings")
 
-sslCertRequirements = None
-if os.getenv("DISABLE_REDIS_SSL"):
+SSL_CERT_REQUIREMENTS_BY_NAME = {
+    "none": ssl.CERT_NONE,
+    "optional": ssl.CERT_OPTIONAL,
+    "required": ssl.CERT_REQUIRED,
+}
+
+# Read each environment variable once
+if os.environ.get("DISABLE_REDIS_SSL"):
     sslCertRequirements = ssl.CERT_NONE
-elif os.getenv("REDIS_SSL_REQUIREMENTS") is not None and os.getenv("REDIS_SSL_REQUIREMENTS") != "":
-    if os.getenv("REDIS_SSL_REQUIREMENTS") == "none":
-        sslCertRequirements = ssl.CERT_NONE
-    elif os.getenv("REDIS_SSL_REQUIREMENTS") == "optional":
-        sslCertRequirements = ssl.CERT_OPTIONAL
-    elif os.getenv("REDIS_SSL_REQUIREMENTS") == "required":
-        sslCertRequirements = ssl.CERT_REQUIRED
+else:
+    sslCertRequirements = SSL_CERT_REQUIREMENTS_BY_NAME.get(os.environ.get("REDIS_SSL_REQUIREMENTS") or "")
 
 # Create the Celery app
 if sslCertRequirements is not None:
@@ -24,23 +25,27 @@ if sslCertRequirements is not None:
         broker_use_ssl={"ssl_cert_reqs": sslCertRequirements},
         redis_backend_use_ssl={"ssl_cert_reqs": sslCertRequirements},
     )
-    # If we are sure that we are using SSL enable support for Redis Cluster hash
-    # tags. This is mainly to prevent CROSSSLOT errors when using Redis Cluster.
-    #
-    # https://github.com/celery/celery/issues/8276#issuecomment-3714489309
-    if sslCertRequirements == ssl.CERT_REQUIRED:
-        app.conf.update(
-            broker_transport_options={
-                "global_keyprefix": "{celeryattendee}:",
-                "fanout_prefix": True,
-                "fanout_patterns": True,
-            },
-        )
+    # broker_transport_options for Redis Cluster are set in settings (CELERY_BROKER_TRANSPORT_OPTIONS)
 else:
     app = Celery("attendee")
 
-# Load configuration from Django settings
-app.config_from_object("django.conf:settings", namespace="CELERY")
+_app_configured = False
+
+
+def configure_app():
+    """Load Celery configuration and discover tasks. Safe to call more than once."""
+    global _app_configured
+    if _app_configured:
+        return app
+
+    # Load configuration from Django settings
+    app.config_from_object("django.conf:settings", namespace="CELERY")
+
+    # Auto-discover tasks from all registered Django apps
+    app.autodiscover_tasks()
+
+    _app_configured = True
+    return app
+
 
-# Auto-discover tasks from all registered Django apps
-app.autodiscover_tasks()
+configure_app()
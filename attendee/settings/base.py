@@ -183,6 +183,17 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 
+# If we are sure that we are using SSL enable support for Redis Cluster hash
+# tags. This is mainly to prevent CROSSSLOT errors when using Redis Cluster.
+#
+# https://github.com/celery/celery/issues/8276#issuecomment-3714489309
+if redis_params.get("ssl_cert_reqs") == "required":
+    CELERY_BROKER_TRANSPORT_OPTIONS = {
+        "global_keyprefix": "{celeryattendee}:",
+        "fanout_prefix": True,
+        "fanout_patterns": True,
+    }
+
 # Task routing - separate queues for different task types
 CELERY_TASK_ROUTES = {
     # Long-running bot tasks - dedicated queue for KEDA scaling
@@ -224,6 +235,36 @@ LOG_FORMATTERS = {
     "json": {"class": "attendee.logging.ISOJsonFormatter", "format": "%(timestamp)s %(name)s %(levelname)s %(message)s"},
 }
 
+
+def make_logging(level="INFO", stream=None, formatter=None):
+    """Build the LOGGING dict shared by all environments. Settings modules only pass in what differs."""
+    console_handler = {"class": "logging.StreamHandler"}
+    if stream is not None:
+        console_handler["stream"] = stream
+    if formatter is not None:
+        console_handler["formatter"] = formatter
+
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": LOG_FORMATTERS,
+        "handlers": {
+            "console": console_handler,
+        },
+        "root": {
+            "handlers": ["console"],
+            "level": level,
+        },
+        "loggers": {
+            "django": {
+                "handlers": ["console"],
+                "level": level,
+                "propagate": False,
+            },
+            "xmlschema": {"level": "WARNING", "handlers": ["console"], "propagate": False},
+        },
+    }
+
 # Set up django storage backend
 # Use s3 by default, but if the STORAGE_PROTOCOL env var is set to "azure", use azure storage
 STORAGE_PROTOCOL = os.getenv("STORAGE_PROTOCOL", "s3")
@@ -269,6 +310,7 @@ if os.getenv("USE_IRSA_FOR_S3_STORAGE", "false") == "true":
     AWS_S3_ADDRESSING_STYLE = "virtual"
 
 CHARGE_CREDITS_FOR_BOTS = os.getenv("CHARGE_CREDITS_FOR_BOTS", "false") == "true"
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 
 # Celery task time limits
 BOT_TASK_SOFT_TIME_LIMIT_SECONDS = int(os.getenv("BOT_TASK_SOFT_TIME_LIMIT_SECONDS", 14400))  # 4 hours default
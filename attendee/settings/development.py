@@ -1,6 +1,7 @@
 import os
 
 from .base import *
+from .base import make_logging
 
 DEBUG = True
 SITE_DOMAIN = "localhost:8000"
@@ -27,30 +28,10 @@ DATABASES = {
 }
 
 # Log more stuff in development
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-        },
-    },
-    "root": {
-        "handlers": ["console"],
-        "level": "INFO",
-    },
-    "loggers": {
-        "django": {
-            "handlers": ["console"],
-            "level": "INFO",
-            "propagate": False,
-        },
-        "xmlschema": {"level": "WARNING", "handlers": ["console"], "propagate": False},
-        # Uncomment to log database queries
-        # "django.db.backends": {
-        #    "handlers": ["console"],
-        #    "level": "DEBUG",
-        #    "propagate": False,
-        # },
-    },
-}
+LOGGING = make_logging()
+# Uncomment to log database queries
+# LOGGING["loggers"]["django.db.backends"] = {
+#    "handlers": ["console"],
+#    "level": "DEBUG",
+#    "propagate": False,
+# }
@@ -4,7 +4,7 @@ import sys
 import dj_database_url
 
 from .base import *
-from .base import LOG_FORMATTERS
+from .base import make_logging
 
 DEBUG = False
 ALLOWED_HOSTS = ["*"]
@@ -55,27 +55,7 @@ SERVER_EMAIL = "noreply@mail.attendee.dev"
 # Needed on GKE
 CSRF_TRUSTED_ORIGINS = os.getenv("CSRF_TRUSTED_ORIGINS", "https://*.attendee.dev").split(",")
 
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": LOG_FORMATTERS,
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "stream": sys.stdout,
-            "formatter": os.getenv("ATTENDEE_LOG_FORMAT"),  # `None` (default formatter) is the default
-        },
-    },
-    "root": {
-        "handlers": ["console"],
-        "level": "INFO",
-    },
-    "loggers": {
-        "django": {
-            "handlers": ["console"],
-            "level": "INFO",
-            "propagate": False,
-        },
-        "xmlschema": {"level": "WARNING", "handlers": ["console"], "propagate": False},
-    },
-}
+LOGGING = make_logging(
+    stream=sys.stdout,
+    formatter=os.getenv("ATTENDEE_LOG_FORMAT"),  # `None` (default formatter) is the default
+)
@@ -4,7 +4,7 @@ import sys
 import dj_database_url
 
 from .base import *
-from .base import LOG_FORMATTERS
+from .base import make_logging
 
 DEBUG = False
 ALLOWED_HOSTS = ["*"]
@@ -51,27 +51,8 @@ if os.getenv("ERROR_REPORTS_RECEIVER_EMAIL_ADDRESS"):
 
 SERVER_EMAIL = os.getenv("SERVER_EMAIL", "noreply@mail.attendee.dev")
 
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": LOG_FORMATTERS,
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "stream": sys.stdout,
-            "formatter": os.getenv("ATTENDEE_LOG_FORMAT"),  # `None` (default formatter) is the default
-        },
-    },
-    "root": {
-        "handlers": ["console"],
-        "level": os.getenv("ATTENDEE_LOG_LEVEL", "INFO"),
-    },
-    "loggers": {
-        "django": {
-            "handlers": ["console"],
-            "level": os.getenv("ATTENDEE_LOG_LEVEL", "INFO"),
-            "propagate": False,
-        },
-        "xmlschema": {"level": "WARNING", "handlers": ["console"], "propagate": False},
-    },
-}
+LOGGING = make_logging(
+    level=os.getenv("ATTENDEE_LOG_LEVEL", "INFO"),
+    stream=sys.stdout,
+    formatter=os.getenv("ATTENDEE_LOG_FORMAT"),  # `None` (default formatter) is the default
+)
@@ -1,6 +1,7 @@
 import os
 
 from .base import *
+from .base import make_logging
 
 DEBUG = True
 SITE_DOMAIN = "localhost:8000"
@@ -19,23 +20,4 @@ DATABASES = {
 
 
 # Log more stuff in development
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-        },
-    },
-    "root": {
-        "handlers": ["console"],
-        "level": "INFO",
-    },
-    "loggers": {
-        "django": {
-            "handlers": ["console"],
-            "level": "INFO",
-            "propagate": False,
-        },
-    },
-}
+LOGGING = make_logging()
@@ -1,5 +1,5 @@
 import logging
-import uuid
+import os
 
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
@@ -22,11 +22,18 @@ from .utils import transcription_provider_from_bot_creation_data
 
 logger = logging.getLogger(__name__)
 
+# Enum members used on every app session creation, bound once at import
+APP_SESSION_INITIAL_STATE = BotStates.READY
+APP_SESSION_SESSION_TYPE = SessionTypes.APP_SESSION
+APP_SESSION_TRANSCRIPTION_TYPE = TranscriptionTypes.NON_REALTIME
+APP_SESSION_CONNECTION_REQUESTED_EVENT_TYPE = BotEventTypes.APP_SESSION_CONNECTION_REQUESTED
+
 
 def create_app_session(data: dict, source: BotCreationSource, project: Project) -> tuple[Bot | None, dict | None]:
     # Given them a small grace period before we start rejecting requests
-    if project.organization.out_of_credits():
-        logger.error(f"Organization {project.organization.id} has insufficient credits. Please add credits in the Account -> Billing page.")
+    organization = project.organization
+    if organization.out_of_credits():
+        logger.error("Organization %s has insufficient credits. Please add credits in the Account -> Billing page.", organization.id)
         return None, {"error": "Organization has run out of credits. Please add more credits in the Account -> Billing page."}
 
     serializer = CreateAppSessionSerializer(data=data)
@@ -43,7 +50,7 @@ def create_app_session(data: dict, source: BotCreationSource, project: Project)
     deduplication_key = serializer.validated_data["deduplication_key"]
     webhook_subscriptions = serializer.validated_data["webhooks"]
     zoom_rtms = serializer.validated_data["zoom_rtms"]
-    initial_state = BotStates.READY
+    initial_state = APP_SESSION_INITIAL_STATE
 
     settings = {
         "transcription_settings": transcription_settings,
@@ -65,13 +72,13 @@ def create_app_session(data: dict, source: BotCreationSource, project: Project)
                 zoom_rtms_stream_id=zoom_rtms.get("rtms_stream_id"),
                 meeting_url="app_session",
                 name="App Session",
-                session_type=SessionTypes.APP_SESSION,
+                session_type=APP_SESSION_SESSION_TYPE,
             )
 
             Recording.objects.create(
                 bot=app_session,
                 recording_type=app_session.recording_type(),
-                transcription_type=TranscriptionTypes.NON_REALTIME,
+                transcription_type=APP_SESSION_TRANSCRIPTION_TYPE,
                 transcription_provider=transcription_provider_from_bot_creation_data(serializer.validated_data),
                 is_default_recording=True,
             )
@@ -80,18 +87,18 @@ def create_app_session(data: dict, source: BotCreationSource, project: Project)
             if webhook_subscriptions:
                 create_webhook_subscriptions(webhook_subscriptions, project, app_session)
 
-            BotEventManager.create_event(bot=app_session, event_type=BotEventTypes.APP_SESSION_CONNECTION_REQUESTED, event_metadata={"source": source})
+            BotEventManager.create_event(bot=app_session, event_type=APP_SESSION_CONNECTION_REQUESTED_EVENT_TYPE, event_metadata={"source": source})
 
             return app_session, None
 
     except ValidationError as e:
-        logger.error(f"ValidationError creating app session: {e}")
+        logger.error("ValidationError creating app session: %s", e)
         return None, {"error": e.messages[0]}
     except Exception as e:
         if isinstance(e, IntegrityError) and "unique_bot_deduplication_key" in str(e):
-            logger.error(f"IntegrityError due to unique_bot_deduplication_key constraint violation creating app session: {e}")
+            logger.error("IntegrityError due to unique_bot_deduplication_key constraint violation creating app session: %s", e)
             return None, {"error": "Deduplication key already in use. A app session in a non-terminal state with this deduplication key already exists. Please use a different deduplication key or wait for that app session to terminate."}
 
-        error_id = str(uuid.uuid4())
-        logger.error(f"Error creating app session (error_id={error_id}): {e}")
+        error_id = os.urandom(8).hex()
+        logger.error("Error creating app session (error_id=%s): %s", error_id, e)
         return None, {"error": f"An error occurred while creating the app session. Error ID: {error_id}"}
@@ -11,6 +11,8 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.models import Organization
+
 from .app_session_api_utils import create_app_session
 from .app_session_serializers import AppSessionSerializer, CreateAppSessionSerializer
 from .authentication import ApiKeyAuthentication
@@ -59,6 +61,17 @@ NewlyCreatedAppSessionExample = OpenApiExample(
     },
 )
 
+AppSessionMediaParameters = [
+    *TokenHeaderParameter,
+    OpenApiParameter(
+        name="object_id",
+        type=str,
+        location=OpenApiParameter.PATH,
+        description="App Session ID",
+        examples=[OpenApiExample("App Session ID Example", value="app_session_xxxxxxxxxxx")],
+    ),
+]
+
 
 @extend_schema(exclude=True)
 class NotFoundView(APIView):
@@ -101,15 +114,18 @@ class AppSessionCreateView(APIView):
         tags=["App Sessions"],
     )
     def post(self, request):
-        app_session, error = create_app_session(data=request.data, source=BotCreationSource.API, project=request.auth.project)
+        project = request.auth.project
+        organization = project.organization
+
+        app_session, error = create_app_session(data=request.data, source=BotCreationSource.API, project=project)
         if error:
             return Response(error, status=status.HTTP_400_BAD_REQUEST)
 
         # Turn the organization's app sessions enabled flag to True
-        organization = request.auth.project.organization
+        # Use a single conditional UPDATE so we only write the one column and never race with credit updates on the same row
         if not organization.is_app_sessions_enabled:
+            Organization.objects.filter(pk=organization.pk, is_app_sessions_enabled=False).update(is_app_sessions_enabled=True)
             organization.is_app_sessions_enabled = True
-            organization.save()
 
         # If this is a scheduled bot, we don't want to launch it yet.
         if app_session.state == BotStates.CONNECTING:
@@ -145,7 +161,7 @@ class AppSessionEndView(APIView):
 
             return Response(AppSessionSerializer(app_session).data, status=status.HTTP_200_OK)
         except ValidationError as e:
-            logging.error(f"Error ending app session: {str(e)} (app_session_id={app_session.object_id})")
+            logger.error("Error ending app session: %s (app_session_id=%s)", e, app_session.object_id)
             return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         except Bot.DoesNotExist:
             return Response({"error": "App session not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -164,37 +180,25 @@ class AppSessionMediaView(APIView):
                 description="Short-lived S3 URL for the recording",
             )
         },
-        parameters=[
-            *TokenHeaderParameter,
-            OpenApiParameter(
-                name="object_id",
-                type=str,
-                location=OpenApiParameter.PATH,
-                description="App Session ID",
-                examples=[OpenApiExample("App Session ID Example", value="app_session_xxxxxxxxxxx")],
-            ),
-        ],
+        parameters=AppSessionMediaParameters,
         tags=["App Sessions"],
     )
     def get(self, request, object_id):
-        try:
-            app_session = Bot.objects.get(object_id=object_id, project=request.auth.project, session_type=SessionTypes.APP_SESSION)
-
-            recording = Recording.objects.filter(bot=app_session, is_default_recording=True).first()
-            if not recording:
-                return Response(
-                    {"error": "No media found for app session"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-
-            recording_file = recording.file
-            if not recording_file:
-                return Response(
-                    {"error": "No media file found for app session"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
+        # Fetch the default recording and its app session in one query
+        recording = Recording.objects.filter(bot__object_id=object_id, bot__project=request.auth.project, bot__session_type=SessionTypes.APP_SESSION, is_default_recording=True).first()
+        if not recording:
+            # Only query the app session separately to tell a missing app session apart from a missing recording
+            if not Bot.objects.filter(object_id=object_id, project=request.auth.project, session_type=SessionTypes.APP_SESSION).exists():
+                return Response({"error": "App session not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(
+                {"error": "No media found for app session"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-            return Response(RecordingSerializer(recording).data)
+        if not recording.file.name:
+            return Response(
+                {"error": "No media file found for app session"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
 
-        except Bot.DoesNotExist:
-            return Response({"error": "App session not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(RecordingSerializer(recording).data)
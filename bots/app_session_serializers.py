@@ -1,3 +1,4 @@
+import functools
 import logging
 
 from rest_framework import serializers
@@ -6,11 +7,14 @@ from .serializers import BotSerializer, CreateBotSerializer
 
 logger = logging.getLogger(__name__)
 
-import jsonschema
 from drf_spectacular.utils import (
     extend_schema_field,
 )
 
+# Bot fields that don't apply to app sessions
+APP_SESSION_EXCLUDED_FIELDS = frozenset(("name", "meeting_url", "join_at"))
+APP_SESSION_BASE_FIELDS = tuple(field for field in BotSerializer.Meta.fields if field not in APP_SESSION_EXCLUDED_FIELDS)
+
 
 @extend_schema_field(
     {
@@ -59,16 +63,17 @@ class CreateAppSessionSerializer(CreateBotSerializer):
     }
 
     class Meta(BotSerializer.Meta):
-        fields = [field for field in BotSerializer.Meta.fields if field not in ["name", "meeting_url", "join_at"]] + ["zoom_rtms"]
+        fields = APP_SESSION_BASE_FIELDS + ("zoom_rtms",)
 
     def validate_zoom_rtms(self, value):
         if value is None:
             raise serializers.ValidationError("zoom_rtms is required")
 
-        try:
-            jsonschema.validate(instance=value, schema=self.ZOOM_RTMS_SCHEMA)
-        except jsonschema.exceptions.ValidationError as e:
-            raise serializers.ValidationError(e.message)
+        import jsonschema
+
+        error = jsonschema.exceptions.best_match(_zoom_rtms_validator().iter_errors(value))
+        if error is not None:
+            raise serializers.ValidationError(error.message)
 
         return value
 
@@ -85,6 +90,15 @@ class CreateAppSessionSerializer(CreateBotSerializer):
         return super().validate_recording_settings(value)
 
 
+@functools.cache
+def _zoom_rtms_validator():
+    # Build the validator once, the first time it is needed. Mirrors jsonschema.validate, which uses the latest draft when the schema has no $schema.
+    import jsonschema
+
+    jsonschema.Draft202012Validator.check_schema(CreateAppSessionSerializer.ZOOM_RTMS_SCHEMA)
+    return jsonschema.Draft202012Validator(CreateAppSessionSerializer.ZOOM_RTMS_SCHEMA)
+
+
 class AppSessionSerializer(BotSerializer):
     # Remove inherited required fields that don't apply to app sessions
     meeting_url = None
@@ -92,4 +106,4 @@ class AppSessionSerializer(BotSerializer):
     join_at = None
 
     class Meta(BotSerializer.Meta):
-        fields = [field for field in BotSerializer.Meta.fields if field not in ["name", "meeting_url", "join_at"]] + ["zoom_rtms_stream_id"]
+        fields = APP_SESSION_BASE_FIELDS + ("zoom_rtms_stream_id",)
@@ -1,5 +1,7 @@
+import functools
 import os
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
 
 
 def _get_env_int(env_var: str, default: int) -> int:
@@ -49,3 +51,9 @@ class AutomaticLeaveConfiguration:
     enable_closed_captions_timeout_seconds: int | None = None
     authorized_user_not_in_meeting_timeout_seconds: int = 600
     bot_keywords: list[str] | None = None
+
+
+@functools.cache
+def default_automatic_leave_settings() -> MappingProxyType:
+    """Read-only mapping of the default automatic leave settings, built once per process."""
+    return MappingProxyType(asdict(AutomaticLeaveConfiguration()))
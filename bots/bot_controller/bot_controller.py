@@ -555,6 +555,11 @@ class BotController:
             logger.info("Telling rtmp client to cleanup...")
             self.rtmp_client.stop()
 
+        if self.webpage_streamer_manager:
+            # Drop any scheduled update or replay, since either would call into the adapter after it's cleaned up
+            self.webpage_streamer_manager.cancel_pending_update()
+            self.webpage_streamer_manager.cancel_delayed_play_bot_output_media_stream()
+
         if self.adapter:
             logger.info("Telling adapter to leave meeting...")
             self.adapter.leave()
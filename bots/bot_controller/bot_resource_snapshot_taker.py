@@ -1,5 +1,11 @@
 import datetime
+import functools
 import logging
+import os
+import socket
+import struct
+import threading
+import time
 from collections import defaultdict
 
 from django.utils import timezone
@@ -11,11 +17,154 @@ logger = logging.getLogger(__name__)
 
 from pathlib import Path
 
+# Large enough to hold smaps_rollup, memory.stat and cpu.stat in a single read
+PSEUDO_FILE_READ_SIZE = 8192
 
-def get_db_connection_count(db_port: int = 5432) -> int:
+
+def _read_pseudo_file(path) -> bytes:
     """
-    Count established TCP connections to the specified port (default: PostgreSQL 5432).
+    Read a small /proc or cgroup file with raw os.read calls.
+
+    These files are generated by the kernel on every read, so slurping them in
+    one syscall is cheaper than iterating a buffered text file line by line and
+    gives a consistent snapshot of the contents.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        data = os.read(fd, PSEUDO_FILE_READ_SIZE)
+        if len(data) < PSEUDO_FILE_READ_SIZE:
+            return data
+        chunks = [data]
+        while chunk := os.read(fd, PSEUDO_FILE_READ_SIZE):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+# File descriptors for the cgroup counter files, kept open for the life of the process
+_cgroup_file_descriptors: dict[str, int] = {}
+
 
+def _read_cgroup_file(path) -> bytes:
+    """
+    Read a cgroup counter file through a cached file descriptor.
+
+    The same few files are polled for every snapshot, so instead of opening and
+    closing them each time we keep the descriptor and pread() from offset 0, which
+    makes the kernel regenerate the contents. If the read fails (e.g. the cgroup was
+    recreated) the descriptor is reopened once.
+    """
+    path = str(path)
+    for attempt in range(2):
+        fd = _cgroup_file_descriptors.get(path)
+        if fd is None:
+            fd = os.open(path, os.O_RDONLY)
+            _cgroup_file_descriptors[path] = fd
+        try:
+            return os.pread(fd, PSEUDO_FILE_READ_SIZE, 0)
+        except OSError:
+            del _cgroup_file_descriptors[path]
+            os.close(fd)
+            if attempt == 1:
+                raise
+
+
+def _find_int_field(data: bytes, key: bytes) -> int | None:
+    """Return the integer that follows *key* at the start of a line in *data*, or None if there is no such line."""
+    if data.startswith(key):
+        start = len(key)
+    else:
+        start = data.find(b"\n" + key)
+        if start == -1:
+            return None
+        start += len(key) + 1
+    end = data.find(b"\n", start)
+    fields = data[start : end if end != -1 else len(data)].split()
+    if not fields:
+        return None
+    return int(fields[0])
+
+
+# Constants from linux/netlink.h, linux/sock_diag.h and linux/inet_diag.h
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLMSG_HEADER_FORMAT = "=IHHII"  # struct nlmsghdr
+NLMSG_HEADER_SIZE = struct.calcsize(NLMSG_HEADER_FORMAT)
+INET_DIAG_REQ_BYTECODE = 1
+INET_DIAG_BC_D_GE = 4
+INET_DIAG_BC_D_LE = 5
+INET_DIAG_SOCKID_SIZE = 48  # struct inet_diag_sockid, left zeroed because the port is matched with bytecode
+TCP_ESTABLISHED = 1
+
+# Set once the kernel or sandbox refuses sock_diag requests, so we don't retry on every snapshot
+_sock_diag_unavailable = False
+
+
+@functools.cache
+def _sock_diag_requests(db_port: int) -> tuple[bytes, ...]:
+    """Build the netlink dump requests for *db_port* once; the port is constant for the life of the process."""
+    # Filter program: accept if dport >= db_port and dport <= db_port. Each comparison is two
+    # inet_diag_bc_op structs (the second one carries the port). "yes" jumps to the next comparison,
+    # "no" jumps past the end of the program, which rejects the socket.
+    bytecode = struct.pack("=BBHBBH", INET_DIAG_BC_D_GE, 8, 20, 0, 0, db_port) + struct.pack("=BBHBBH", INET_DIAG_BC_D_LE, 8, 12, 0, 0, db_port)
+    bytecode_attribute = struct.pack("=HH", 4 + len(bytecode), INET_DIAG_REQ_BYTECODE) + bytecode
+
+    requests = []
+    for sequence_number, family in enumerate((socket.AF_INET, socket.AF_INET6), start=1):
+        # struct inet_diag_req_v2
+        request = struct.pack("=BBBxI", family, socket.IPPROTO_TCP, 0, 1 << TCP_ESTABLISHED) + bytes(INET_DIAG_SOCKID_SIZE) + bytecode_attribute
+        requests.append(struct.pack(NLMSG_HEADER_FORMAT, NLMSG_HEADER_SIZE + len(request), SOCK_DIAG_BY_FAMILY, NLM_F_REQUEST | NLM_F_DUMP, sequence_number, 0) + request)
+    return tuple(requests)
+
+
+def _get_db_connection_count_from_sock_diag(db_port: int) -> int:
+    """
+    Count established TCP connections to *db_port* with a NETLINK_SOCK_DIAG dump.
+
+    The kernel applies the state and destination port filter itself and only
+    returns matching sockets in binary form, so unlike /proc/net/tcp the cost
+    doesn't grow with the total number of sockets on the host.
+    """
+    count = 0
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG) as sock:
+        for request in _sock_diag_requests(db_port):
+            sock.send(request)
+
+            done = False
+            while not done:
+                data = sock.recv(65536)
+                offset = 0
+                while offset + NLMSG_HEADER_SIZE <= len(data):
+                    message_length, message_type, _, _, _ = struct.unpack_from(NLMSG_HEADER_FORMAT, data, offset)
+                    if message_type == NLMSG_DONE:
+                        done = True
+                        break
+                    if message_type == NLMSG_ERROR:
+                        (error,) = struct.unpack_from("=i", data, offset + NLMSG_HEADER_SIZE)
+                        if error:
+                            raise OSError(-error, os.strerror(-error))
+                        done = True
+                        break
+                    if message_type == SOCK_DIAG_BY_FAMILY:
+                        count += 1
+                    # Messages are 4-byte aligned
+                    offset += (message_length + 3) & ~3
+
+    return count
+
+
+@functools.cache
+def _proc_net_tcp_needle(db_port: int) -> bytes:
+    return f":{db_port:04X} 01 ".encode()
+
+
+def _get_db_connection_count_from_proc(db_port: int) -> int:
+    """
     Reads from /proc/net/tcp and /proc/net/tcp6 to count connections without
     requiring the psutil dependency.
 
@@ -24,32 +173,45 @@ def get_db_connection_count(db_port: int = 5432) -> int:
     where rem_address is hex IP:PORT and st is connection state (01 = ESTABLISHED).
     """
     count = 0
-    db_port_hex = format(db_port, "04X")  # 5432 -> "1538"
+    # The kernel writes the remote port as 4 uppercase hex digits followed by the state, e.g. "0A0A0A0A:1538 01 ".
+    # No other column has 4 hex digits after a colon followed by a space, so counting this pattern in the raw
+    # bytes counts ESTABLISHED connections to the port without splitting every line into strings.
+    needle = _proc_net_tcp_needle(db_port)
 
     for tcp_file in [Path("/proc/net/tcp"), Path("/proc/net/tcp6")]:
         try:
-            with tcp_file.open() as f:
-                next(f, None)  # Skip header line
-                for line in f:
-                    parts = line.split()
-                    if len(parts) < 4:
-                        continue
-
-                    rem_address = parts[2]
-                    state = parts[3]
-
-                    # Remote port is after the colon in rem_address (e.g., "0A0A0A0A:1538")
-                    if ":" in rem_address:
-                        rem_port = rem_address.split(":")[1].upper()
-                        # State 01 = ESTABLISHED
-                        if rem_port == db_port_hex and state == "01":
-                            count += 1
+            # These files can be several MB on busy hosts and the kernel may return short reads, so read to EOF
+            with tcp_file.open("rb") as f:
+                count += f.read().count(needle)
         except (FileNotFoundError, PermissionError):
             continue
 
     return count
 
 
+def get_db_connection_count(db_port: int = 5432) -> int:
+    """
+    Count established TCP connections to the specified port (default: PostgreSQL 5432).
+
+    Uses a netlink sock_diag query when available and falls back to parsing
+    /proc/net/tcp and /proc/net/tcp6 otherwise.
+    """
+    global _sock_diag_unavailable
+    if not _sock_diag_unavailable:
+        try:
+            return _get_db_connection_count_from_sock_diag(db_port)
+        except OSError as e:
+            logger.info(f"sock_diag is unavailable ({e}), falling back to /proc/net/tcp for db connection counts")
+            _sock_diag_unavailable = True
+
+    return _get_db_connection_count_from_proc(db_port)
+
+
+# Process names by PID, carried across snapshots so we don't re-read /proc/<pid>/comm for
+# long-lived processes. Entries for PIDs that have exited are dropped on every scan.
+_process_name_cache: dict[int, str] = {}
+
+
 def get_process_memory_list():
     """
     Scan /proc and return a list of process *names* with their proportional
@@ -63,45 +225,48 @@ def get_process_memory_list():
 
     Sorted by memory descending (largest first).
     """
-    proc_root = Path("/proc")
     memory_by_name_kb = defaultdict(int)
-
-    for entry in proc_root.iterdir():
-        # Only numeric dirs are PIDs
-        if not entry.name.isdigit():
-            continue
-
-        pid_dir = entry
-        smaps_rollup_path = pid_dir / "smaps_rollup"
-        comm_path = pid_dir / "comm"
-
-        try:
-            # Read PSS from smaps_rollup (kB)
-            pss_kb = None
-            with smaps_rollup_path.open() as f:
-                for line in f:
-                    # Example: "Pss:          12345 kB"
-                    if line.startswith("Pss:"):
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            pss_kb = int(parts[1])
-                        break
-
-            if pss_kb is None:
+    seen_pids = set()
+
+    # os.scandir yields plain-str names straight from getdents, so the scan of
+    # hundreds of /proc entries avoids building Path objects for each one.
+    with os.scandir("/proc") as it:
+        for entry in it:
+            pid_name = entry.name
+            # Only numeric dirs are PIDs
+            if not ("0" <= pid_name[0] <= "9") or not pid_name.isdigit():
                 continue
 
-            # Get a human-ish name; fall back to something generic if missing
+            pid_dir = "/proc/" + pid_name
             try:
-                name = comm_path.read_text().strip() or "unknown"
-            except FileNotFoundError:
-                name = "unknown"
-
-            # Aggregate by name
-            memory_by_name_kb[name] += pss_kb
+                # Read PSS from smaps_rollup (kB)
+                # Example: "Pss:          12345 kB"
+                pss_kb = _find_int_field(_read_pseudo_file(pid_dir + "/smaps_rollup"), b"Pss:")
+
+                if pss_kb is None:
+                    continue
+
+                # Get a human-ish name; fall back to something generic if missing
+                pid = int(pid_name)
+                name = _process_name_cache.get(pid)
+                if name is None:
+                    try:
+                        name = _read_pseudo_file(pid_dir + "/comm").decode(errors="replace").strip() or "unknown"
+                    except FileNotFoundError:
+                        name = "unknown"
+                    _process_name_cache[pid] = name
+                seen_pids.add(pid)
+
+                # Aggregate by name
+                memory_by_name_kb[name] += pss_kb
+
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                # Process may have exited or we might not have perms; just skip
+                continue
 
-        except (FileNotFoundError, ProcessLookupError, PermissionError):
-            # Process may have exited or we might not have perms; just skip
-            continue
+    # Forget processes that have exited so a recycled PID gets its name re-read
+    for pid in _process_name_cache.keys() - seen_pids:
+        del _process_name_cache[pid]
 
     # Convert to list of dicts in MiB
     processes = [
@@ -125,6 +290,8 @@ def get_process_memory_list():
     return top_5_processes
 
 
+# The cgroup layout can't change while the process is running, so the detection only runs once
+@functools.cache
 def _detect_cgroup_layout():
     """Return paths to the usage and stat files for this container."""
     # cgroup v2 has /sys/fs/cgroup/cgroup.controllers
@@ -142,21 +309,17 @@ def _detect_cgroup_layout():
 def _read_first_match(path: Path, key: str, default: int = 0) -> int:
     """Parse `/sys/fs/cgroup/*/memory.stat` and return the integer after *key*."""
     try:
-        with path.open() as fh:
-            for line in fh:
-                if line.startswith(key):
-                    return int(line.split()[1])
+        value = _find_int_field(_read_cgroup_file(path), key.encode())
     except FileNotFoundError:
-        pass
-    return default
+        return default
+    return default if value is None else value
 
 
 def container_memory_mib() -> int:
     usage_path, stat_path = _detect_cgroup_layout()
 
     # Raw usage: everything the pod is holding.
-    with usage_path.open() as fh:
-        usage_bytes = int(fh.read().strip())
+    usage_bytes = int(_read_cgroup_file(usage_path))
 
     # Reclaimable cache: what metrics-server subtracts.
     inactive_file = _read_first_match(stat_path, "inactive_file")
@@ -165,6 +328,7 @@ def container_memory_mib() -> int:
     return working_set // (1024 * 1024)
 
 
+@functools.cache
 def _detect_cpu_files():
     """
     Return (usage_path, scale) where:
@@ -179,25 +343,73 @@ def _detect_cpu_files():
     return Path("/sys/fs/cgroup/cpuacct/cpuacct.usage"), 1_000_000  # ns
 
 
-def _read_cpu_usage(path: Path, scale: int) -> int:
+@functools.cache
+def _cpu_usage_reader():
     """
-    Read the cumulative CPU usage, already divided by *scale* so that
-    1 unit = 1 millicore×second.
+    Return a function that reads the cumulative CPU usage, already divided by
+    *scale* so that 1 unit = 1 millicore×second. The parser for this cgroup
+    version is picked once instead of on every read.
     """
-    if "cpu.stat" in str(path):
-        # cgroup v2 – grab `usage_usec` (first field of cpu.stat)
-        with path.open() as fh:
-            for line in fh:
-                if line.startswith("usage_usec"):
-                    return int(line.split()[1]) // scale  # µs → mcore·s
-        raise RuntimeError("usage_usec not found in cpu.stat")
-    # cgroup v1 – cpuacct.usage (ns)
-    return int(path.read_text().strip()) // scale  # ns → mcore·s
+    usage_file, scale = _detect_cpu_files()
+
+    if usage_file.name == "cpu.stat":
+
+        def read_cpu_stat_usage() -> int:
+            # cgroup v2 – grab `usage_usec` (first field of cpu.stat)
+            usage_usec = _find_int_field(_read_cgroup_file(usage_file), b"usage_usec")
+            if usage_usec is None:
+                raise RuntimeError("usage_usec not found in cpu.stat")
+            return usage_usec // scale  # µs → mcore·s
+
+        return read_cpu_stat_usage
+
+    def read_cpuacct_usage() -> int:
+        # cgroup v1 – cpuacct.usage (ns)
+        return int(_read_cgroup_file(usage_file)) // scale  # ns → mcore·s
+
+    return read_cpuacct_usage
 
 
 def get_cpu_usage_millicores():
-    usage_file, scale = _detect_cpu_files()
-    return _read_cpu_usage(usage_file, scale)
+    return _cpu_usage_reader()()
+
+
+def _cached_for(interval_seconds: float, default):
+    """
+    Wrap a zero-argument sampler so it runs at most once per *interval_seconds*.
+
+    The /proc scans report on the whole container rather than a single bot, so
+    the cache lives at module level and every snapshot taker in the process
+    shares it. If the sampler raises, *default* is served until the next
+    refresh and the exception is re-raised to the caller that triggered it.
+    """
+
+    def decorator(func):
+        lock = threading.Lock()
+        state = {"expires_at": None, "value": default}
+
+        @functools.wraps(func)
+        def wrapper():
+            with lock:
+                now = time.monotonic()
+                if state["expires_at"] is None or now >= state["expires_at"]:
+                    state["expires_at"] = now + interval_seconds
+                    try:
+                        state["value"] = func()
+                    except Exception:
+                        state["value"] = default
+                        raise
+                return state["value"]
+
+        return wrapper
+
+    return decorator
+
+
+# Scanning every process in /proc and counting sockets are much more expensive than reading
+# the cgroup counters, so they are sampled less often and reused by the snapshots in between.
+get_cached_process_memory_list = _cached_for(5 * 60, [])(get_process_memory_list)
+get_cached_db_connection_count = _cached_for(60, None)(get_db_connection_count)
 
 
 def pod_cpu_millicores(window_seconds: int, u0: int, u1: int) -> int:
@@ -273,16 +485,16 @@ class BotResourceSnapshotTaker:
             logger.error(f"Error getting resource usage for bot {self.bot.object_id}: {ram_usage_megabytes} or {cpu_usage_millicores_delta_per_second} was None")
             return
 
-        processes = []
         try:
-            processes = get_process_memory_list()
+            processes = get_cached_process_memory_list()
         except Exception as e:
+            processes = []
             logger.error(f"Error getting process memory list for bot {self.bot.object_id}: {e}. Continuing...")
 
-        db_connection_count = None
         try:
-            db_connection_count = get_db_connection_count()
+            db_connection_count = get_cached_db_connection_count()
         except Exception as e:
+            db_connection_count = None
             logger.error(f"Error getting db connection count for bot {self.bot.object_id}: {e}. Continuing...")
 
         snapshot_data = {
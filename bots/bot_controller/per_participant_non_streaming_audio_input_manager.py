@@ -1,43 +1,63 @@
+import audioop
+import functools
 import logging
-import queue
 import time
+from collections import deque
 from datetime import datetime, timedelta
 
-import numpy as np
 import webrtcvad
 
 logger = logging.getLogger(__name__)
 
+# Chunks with a normalized RMS below this are treated as silence without running the VAD
+RMS_SILENCE_THRESHOLD = 0.01
+
 
 def calculate_normalized_rms(audio_bytes):
-    samples = np.frombuffer(audio_bytes, dtype=np.int16)
-    rms = np.sqrt(np.mean(np.square(samples)))
+    # audioop computes the RMS of 16-bit samples in C without allocating a numpy array
+    # (np.square on the raw int16 samples also overflowed for loud audio).
     # Normalize by max possible value for 16-bit audio (32768)
-    return rms / 32768
+    return audioop.rms(audio_bytes, 2) / 32768
+
+
+class Utterance:
+    """The audio buffered for one speaker since they started talking."""
+
+    __slots__ = ("chunks", "size", "first_nonsilent_audio_time", "last_nonsilent_audio_time")
+
+    def __init__(self, chunk_time):
+        # Chunks are joined once when the utterance is flushed, which avoids growing a bytearray
+        # and then copying it again into bytes.
+        self.chunks = []
+        self.size = 0
+        self.first_nonsilent_audio_time = chunk_time
+        self.last_nonsilent_audio_time = chunk_time
 
 
 class PerParticipantNonStreamingAudioInputManager:
     def __init__(self, *, save_audio_chunk_callback, get_participant_callback, sample_rate, utterance_size_limit, silence_duration_limit, should_print_diagnostic_info):
-        self.queue = queue.Queue()
+        # Chunks are appended from the audio callback thread and drained by process_chunks. deque.append and
+        # deque.popleft are atomic, so unlike queue.Queue no lock or condition variable is needed per chunk.
+        self.queue = deque()
 
         self.save_audio_chunk_callback = save_audio_chunk_callback
         self.get_participant_callback = get_participant_callback
 
+        # In-progress utterances by speaker id. A speaker only has an entry while they have unflushed audio.
         self.utterances = {}
         self.sample_rate = sample_rate
 
-        self.first_nonsilent_audio_time = {}
-        self.last_nonsilent_audio_time = {}
-
         self.UTTERANCE_SIZE_LIMIT = utterance_size_limit
         self.SILENCE_DURATION_LIMIT = silence_duration_limit
-        self.vad = webrtcvad.Vad()
+        # The VAD only accepts 10, 20 or 30 ms frames of 16-bit samples, so precompute those sizes in bytes
+        self.vad_frame_sizes = frozenset(ms * sample_rate // 1000 * 2 for ms in (10, 20, 30))
+        self.vad_max_frame_size = max(self.vad_frame_sizes)
 
         self.should_print_diagnostic_info = should_print_diagnostic_info
         self.reset_diagnostic_info()
 
     def add_chunk(self, speaker_id, chunk_time, chunk_bytes):
-        self.queue.put((speaker_id, chunk_time, chunk_bytes))
+        self.queue.append((speaker_id, chunk_time, chunk_bytes))
         self.diagnostic_info["total_chunks_added"] += 1
 
     def reset_diagnostic_info(self):
@@ -60,30 +80,41 @@ class PerParticipantNonStreamingAudioInputManager:
             self.reset_diagnostic_info()
 
     def process_chunks(self):
-        while not self.queue.empty():
-            speaker_id, chunk_time, chunk_bytes = self.queue.get()
+        while self.queue:
+            speaker_id, chunk_time, chunk_bytes = self.queue.popleft()
             self.process_chunk(speaker_id, chunk_time, chunk_bytes)
 
-        for speaker_id in list(self.first_nonsilent_audio_time.keys()):
+        for speaker_id in list(self.utterances.keys()):
             self.process_chunk(speaker_id, datetime.utcnow(), None)
 
         self.print_diagnostic_info()
 
     # When the meeting ends, we need to flush all utterances. Do this by pretending that we received a chunk of silence at the end of the meeting.
     def flush_utterances(self):
-        for speaker_id in list(self.first_nonsilent_audio_time.keys()):
+        for speaker_id in list(self.utterances.keys()):
             self.process_chunk(
                 speaker_id,
                 datetime.utcnow() + timedelta(seconds=self.SILENCE_DURATION_LIMIT + 1),
                 None,
             )
 
+    # The bot controller builds both the streaming and non-streaming managers but only feeds audio to one
+    # of them, so the VAD is only created once audio actually arrives.
+    @functools.cached_property
+    def vad(self):
+        return webrtcvad.Vad()
+
     def is_speech(self, chunk_bytes):
+        chunk_size = len(chunk_bytes)
+        # The VAD can handle a max of 30 ms of audio. If it is larger than that, just return True
+        if chunk_size > self.vad_max_frame_size:
+            self.diagnostic_info["total_chunks_too_large_for_vad"] += 1
+            return True
+        # Any other frame length would make the VAD raise, so skip the call and treat it as speech
+        if chunk_size not in self.vad_frame_sizes:
+            self.diagnostic_info["total_chunks_that_caused_vad_error"] += 1
+            return True
         try:
-            # The VAD can handle a max of 30 ms of audio. If it is larger than that, just return True
-            if len(chunk_bytes) > 30 * self.sample_rate // 1000:
-                self.diagnostic_info["total_chunks_too_large_for_vad"] += 1
-                return True
             return self.vad.is_speech(chunk_bytes, self.sample_rate)
         except Exception as e:
             logger.exception("Error in VAD: " + str(e))
@@ -91,11 +122,13 @@ class PerParticipantNonStreamingAudioInputManager:
             return True
 
     def silence_detected(self, chunk_bytes):
-        rms_value = calculate_normalized_rms(chunk_bytes)
-        if rms_value == 0:
+        # Order the checks from cheapest to most expensive. The RMS can never exceed the peak amplitude,
+        # so all-zero and quiet chunks (most meeting audio) are classified from the peak alone.
+        peak = audioop.max(chunk_bytes, 2)
+        if peak == 0:
             self.diagnostic_info["total_chunks_marked_as_silent_due_to_rms_being_zero"] += 1
             return True
-        if rms_value < 0.01:
+        if peak < RMS_SILENCE_THRESHOLD * 32768 or calculate_normalized_rms(chunk_bytes) < RMS_SILENCE_THRESHOLD:
             self.diagnostic_info["total_chunks_marked_as_silent_due_to_rms_being_small"] += 1
             return True
         if not self.is_speech(chunk_bytes):
@@ -107,45 +140,45 @@ class PerParticipantNonStreamingAudioInputManager:
         audio_is_silent = self.silence_detected(chunk_bytes) if chunk_bytes else True
 
         # Initialize buffer and timing for new speaker
-        if speaker_id not in self.utterances or len(self.utterances[speaker_id]) == 0:
+        utterance = self.utterances.get(speaker_id)
+        if utterance is None:
             if audio_is_silent:
                 return
-            self.utterances[speaker_id] = bytearray()
-            self.first_nonsilent_audio_time[speaker_id] = chunk_time
-            self.last_nonsilent_audio_time[speaker_id] = chunk_time
+            utterance = self.utterances[speaker_id] = Utterance(chunk_time)
 
         # Add new audio data to buffer
         if chunk_bytes:
-            self.utterances[speaker_id].extend(chunk_bytes)
+            utterance.chunks.append(chunk_bytes)
+            utterance.size += len(chunk_bytes)
 
         should_flush = False
         reason = None
 
         # Check buffer size
-        if len(self.utterances[speaker_id]) >= self.UTTERANCE_SIZE_LIMIT:
+        if utterance.size >= self.UTTERANCE_SIZE_LIMIT:
             should_flush = True
             reason = "buffer_full"
 
         # Check for silence
         if audio_is_silent:
-            silence_duration = (chunk_time - self.last_nonsilent_audio_time[speaker_id]).total_seconds()
+            silence_duration = (chunk_time - utterance.last_nonsilent_audio_time).total_seconds()
             if silence_duration >= self.SILENCE_DURATION_LIMIT:
                 should_flush = True
                 reason = "silence_limit"
         else:
-            self.last_nonsilent_audio_time[speaker_id] = chunk_time
+            utterance.last_nonsilent_audio_time = chunk_time
 
             logger.debug(f"Speaker {speaker_id} is speaking")
 
         # Flush buffer if needed
-        if should_flush and len(self.utterances[speaker_id]) > 0:
+        if should_flush and utterance.size > 0:
             participant = self.get_participant_callback(speaker_id)
             if participant:
                 self.save_audio_chunk_callback(
                     {
                         **participant,
-                        "audio_data": bytes(self.utterances[speaker_id]),
-                        "timestamp_ms": int(self.first_nonsilent_audio_time[speaker_id].timestamp() * 1000),
+                        "audio_data": b"".join(utterance.chunks),
+                        "timestamp_ms": int(utterance.first_nonsilent_audio_time.timestamp() * 1000),
                         "flush_reason": reason,
                         "sample_rate": self.sample_rate,
                     }
@@ -155,6 +188,4 @@ class PerParticipantNonStreamingAudioInputManager:
                 logger.warning(f"Participant {speaker_id} not found")
                 self.diagnostic_info["total_audio_chunks_not_sent_because_participant_not_found"] += 1
             # Clear the buffer
-            self.utterances[speaker_id] = bytearray()
-            del self.first_nonsilent_audio_time[speaker_id]
-            del self.last_nonsilent_audio_time[speaker_id]
+            del self.utterances[speaker_id]
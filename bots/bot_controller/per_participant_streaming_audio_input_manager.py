@@ -1,7 +1,8 @@
+import audioop
+import functools
 import logging
 import time
 
-import numpy as np
 import webrtcvad
 
 from bots.models import (
@@ -19,37 +20,9 @@ from bots.transcription_providers.utterance_handler import DefaultUtteranceHandl
 logger = logging.getLogger(__name__)
 
 
-def calculate_normalized_rms(audio_bytes):
-    if not audio_bytes or len(audio_bytes) < 2:
-        return 0.0
-
-    try:
-        samples = np.frombuffer(audio_bytes, dtype=np.int16)
-        if len(samples) == 0:
-            return 0.0
-
-        # Check for any NaN or infinite values in samples
-        if not np.isfinite(samples).all():
-            return 0.0
-
-        # Calculate mean of squares first
-        mean_square = np.mean(np.square(samples.astype(np.float64)))
-
-        # Check if mean_square is valid before sqrt
-        if not np.isfinite(mean_square) or mean_square < 0:
-            return 0.0
-
-        rms = np.sqrt(mean_square)
-
-        # Handle NaN case (shouldn't happen with valid data, but be safe)
-        if not np.isfinite(rms):
-            return 0.0
-
-        # Normalize by max possible value for 16-bit audio (32768)
-        return rms / 32768
-    except (ValueError, TypeError, BufferError, FloatingPointError):
-        # If there's any issue with the audio data, treat as silence
-        return 0.0
+# Chunks whose RMS is below this are treated as silence without running the VAD. It is the
+# normalized threshold of 0.0025 scaled to 16-bit samples, so audioop.rms can be compared directly.
+RMS_SILENCE_THRESHOLD = 0.0025 * 32768
 
 
 class PerParticipantStreamingAudioInputManager:
@@ -69,10 +42,11 @@ class PerParticipantStreamingAudioInputManager:
         else:
             self.SILENCE_DURATION_LIMIT = 300  # 5 minutes of inactivity
 
-        self.vad = webrtcvad.Vad()
         self.transcription_provider = transcription_provider
         self.streaming_transcribers = {}
         self.last_nonsilent_audio_time = {}
+        # Display names of speakers with a transcriber, resolved when the transcriber is created
+        self.participant_names = {}
 
         self.project = bot.project
         self.bot = bot
@@ -82,8 +56,16 @@ class PerParticipantStreamingAudioInputManager:
         # Create utterance handler for providers that need it (like Kyutai)
         self.utterance_handler = DefaultUtteranceHandler(bot=bot, get_participant_callback=get_participant_callback, sample_rate=sample_rate)
 
+    # Created on first use, this manager is constructed for every bot even when non-streaming transcription is used
+    @functools.cached_property
+    def vad(self):
+        return webrtcvad.Vad()
+
     def silence_detected(self, chunk_bytes):
-        if calculate_normalized_rms(chunk_bytes) < 0.0025:
+        # A partial sample means the buffer is malformed, treat it as silence
+        if not chunk_bytes or len(chunk_bytes) % 2:
+            return True
+        if audioop.rms(chunk_bytes, 2) < RMS_SILENCE_THRESHOLD:
             return True
         return not self.vad.is_speech(chunk_bytes, self.sample_rate)
 
@@ -157,6 +139,7 @@ class PerParticipantStreamingAudioInputManager:
             return None
         metadata = {"bot_id": self.bot.object_id, **(self.bot.metadata or {}), **participant_info}
         participant_name = metadata.get("participant_full_name", speaker_id)
+        self.participant_names[speaker_id] = participant_name
 
         logger.info(f"Creating streaming transcriber for speaker {speaker_id} ({participant_name})")
         self.streaming_transcribers[speaker_id] = self.create_streaming_transcriber(speaker_id, metadata)
@@ -191,8 +174,7 @@ class PerParticipantStreamingAudioInputManager:
                 try:
                     streaming_transcriber.send(chunk_bytes)
                 except Exception as e:
-                    participant_info = self.get_participant_callback(speaker_id)
-                    participant_name = participant_info.get("participant_full_name", speaker_id) if participant_info else speaker_id
+                    participant_name = self.participant_names.get(speaker_id, speaker_id)
                     logger.info(f"Recreating transcriber for speaker {speaker_id} ({participant_name}) after connection failure: {e}")
                     # Remove failed transcriber so it will be recreated on next chunk
                     if speaker_id in self.streaming_transcribers:
@@ -215,19 +197,20 @@ class PerParticipantStreamingAudioInputManager:
 
     def monitor_transcription(self):
         speakers_to_remove = []
+        now = time.time()
+        silence_limit = self.SILENCE_DURATION_LIMIT
         streaming_transcriber_keys = list(self.streaming_transcribers.keys())
         for speaker_id in streaming_transcriber_keys:
             streaming_transcriber = self.streaming_transcribers[speaker_id]
-            silence_limit = self.SILENCE_DURATION_LIMIT
 
             # Defensive: ensure we have timing data for this speaker
             if speaker_id not in self.last_nonsilent_audio_time:
                 # Initialize with current time if missing (shouldn't happen)
-                self.last_nonsilent_audio_time[speaker_id] = time.time()
+                self.last_nonsilent_audio_time[speaker_id] = now
                 logger.warning(f"Missing last_nonsilent_audio_time for speaker {speaker_id}, initializing")
                 continue
 
-            time_since_audio = time.time() - self.last_nonsilent_audio_time[speaker_id]
+            time_since_audio = now - self.last_nonsilent_audio_time[speaker_id]
             if time_since_audio > silence_limit:
                 streaming_transcriber.finish()
                 speakers_to_remove.append(speaker_id)
@@ -235,6 +218,7 @@ class PerParticipantStreamingAudioInputManager:
 
         for speaker_id in speakers_to_remove:
             del self.streaming_transcribers[speaker_id]
+            self.participant_names.pop(speaker_id, None)
             # Also clean up timing data
             if speaker_id in self.last_nonsilent_audio_time:
                 del self.last_nonsilent_audio_time[speaker_id]
@@ -246,4 +230,5 @@ class PerParticipantStreamingAudioInputManager:
             oldest_speaker_id, oldest_transcriber = min(self.streaming_transcribers.items(), key=lambda item: item[1].last_send_time)
             oldest_transcriber.finish()
             del self.streaming_transcribers[oldest_speaker_id]
+            self.participant_names.pop(oldest_speaker_id, None)
             logger.info(f"Stopped oldest streaming transcriber for speaker {oldest_speaker_id}")
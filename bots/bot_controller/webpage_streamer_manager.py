@@ -1,12 +1,26 @@
 import logging
 import os
 import threading
-import time
 
+import gi
 import requests
 
+gi.require_version("GLib", "2.0")
+from gi.repository import GLib
+
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts for requests to the webpage streamer, so a half-dead streamer pod can't hang the bot
+WEBPAGE_STREAMER_REQUEST_TIMEOUT = (3, 10)
+# The streamer loads the page before answering /start_streaming and gathers ICE candidates before answering /offer
+WEBPAGE_STREAMER_NAVIGATION_REQUEST_TIMEOUT = (3, 60)
+# We don't need the response to the shutdown request, so don't hold up cleanup waiting for it
+WEBPAGE_STREAMER_SHUTDOWN_REQUEST_TIMEOUT = (1, 2)
+# How long to let a burst of update() calls settle before applying the latest one
+UPDATE_COALESCE_MILLISECONDS = 50
+# How long to wait before replaying the bot output media stream after it was stopped or moved to a new page
+DELAYED_PLAY_MILLISECONDS = 1000
+
 
 class WebpageStreamerManager:
     def __init__(
@@ -26,13 +40,23 @@ class WebpageStreamerManager:
         self.start_peer_connection_callback = start_peer_connection_callback
         self.cleaned_up = False
         self.webpage_streamer_service_hostname = webpage_streamer_service_hostname
+        # The streaming service location doesn't change while the bot runs, so build the base url once
+        self.streaming_service_base_url = f"http://{self.streaming_service_hostname()}:8000"
         self.is_bot_ready_for_webpage_streamer_callback = is_bot_ready_for_webpage_streamer_callback
         self.play_bot_output_media_stream_callback = play_bot_output_media_stream_callback
         self.stop_bot_output_media_stream_callback = stop_bot_output_media_stream_callback
         self.on_message_that_webpage_streamer_connection_can_start_callback = on_message_that_webpage_streamer_connection_can_start_callback
         self.webrtc_connection_started = False
         self.keepalive_task = None
+        # Set on cleanup so the keepalive thread wakes up immediately instead of finishing its current wait
+        self.shutdown_event = threading.Event()
         self.webpage_streamer_connection_can_start = False
+        # Every request goes to the same streamer service, so reuse pooled connections instead of opening one per request
+        self.session = requests.Session()
+        self.delayed_play_source_id = None
+        # update() only records the latest requested state here; a timeout on the main loop applies it
+        self.pending_update = None
+        self.pending_update_source_id = None
 
     def init(self):
         if self.keepalive_task is not None:
@@ -41,14 +65,39 @@ class WebpageStreamerManager:
         self.keepalive_task = threading.Thread(target=self.send_webpage_streamer_keepalive_periodically, daemon=True)
         self.keepalive_task.start()
 
+    def update(self, url, output_destination):
+        # Only the latest requested state matters, so let a burst of calls settle and apply it once. The timeout runs on
+        # the bot controller's main loop, like the update() call itself, so the adapter callbacks stay on that loop.
+        self.pending_update = (url, output_destination)
+        if self.pending_update_source_id is None:
+            self.pending_update_source_id = GLib.timeout_add(UPDATE_COALESCE_MILLISECONDS, self.apply_pending_update)
+
+    def apply_pending_update(self):
+        self.pending_update_source_id = None
+        pending_update, self.pending_update = self.pending_update, None
+        if pending_update is not None and not self.cleaned_up:
+            try:
+                self.apply_update(*pending_update)
+            except Exception as e:
+                logger.exception(f"Error updating webpage streamer: {e}")
+        # Don't repeat the timeout
+        return False
+
+    # Called before the adapter is cleaned up, so nothing scheduled here can call into it afterwards
+    def cancel_pending_update(self):
+        if self.pending_update_source_id is not None:
+            GLib.source_remove(self.pending_update_source_id)
+            self.pending_update_source_id = None
+        self.pending_update = None
+
     # Possible cases:
     # 1. Streaming has not started yet.
     # 2. Streaming has started. URL has changed.
     # 3. Streaming has started. Output destination has changed.
     # 4. Streaming has started. URL and output destination have changed.
-    def update(self, url, output_destination):
+    def apply_update(self, url, output_destination):
         if not self.webpage_streamer_connection_can_start:
-            logger.info("In WebpageStreamerManager.update, Webpage streamer connection can not start yet. Not updating.")
+            logger.info("In WebpageStreamerManager.apply_update, Webpage streamer connection can not start yet. Not updating.")
             return
 
         sleep_before_playing_bot_output_media_stream = False
@@ -62,17 +111,21 @@ class WebpageStreamerManager:
                         sleep_before_playing_bot_output_media_stream = True
                 if output_destination != self.output_destination and self.output_destination:
                     logger.info("Stopping bot output media stream")
+                    self.cancel_delayed_play_bot_output_media_stream()
                     self.stop_bot_output_media_stream_callback()
                     sleep_before_playing_bot_output_media_stream = True  # Seems like there's sometimes a DOM glitch if we don't wait a bit. Not ideal.
                 # Tell the adapter to start rendering the bot output media stream in the webcam / screenshare
-                if sleep_before_playing_bot_output_media_stream:
-                    time.sleep(1)
                 only_change_was_url = url != self.url and output_destination == self.output_destination
                 if not only_change_was_url:
-                    logger.info(f"Playing bot output media stream to {output_destination}")
-                    self.play_bot_output_media_stream_callback(output_destination)
+                    self.cancel_delayed_play_bot_output_media_stream()
+                    if sleep_before_playing_bot_output_media_stream:
+                        # Wait on the main loop rather than blocking it for the pause
+                        self.delayed_play_source_id = GLib.timeout_add(DELAYED_PLAY_MILLISECONDS, self.play_delayed_bot_output_media_stream, output_destination)
+                    else:
+                        self.play_bot_output_media_stream(output_destination)
             if not url:
                 logger.info("Stopping bot output media stream because url is empty")
+                self.cancel_delayed_play_bot_output_media_stream()
                 self.stop_bot_output_media_stream_callback()
 
         self.url = url
@@ -80,12 +133,34 @@ class WebpageStreamerManager:
         if url:
             self.last_non_empty_url = url
 
+    def play_bot_output_media_stream(self, output_destination):
+        logger.info(f"Playing bot output media stream to {output_destination}")
+        self.play_bot_output_media_stream_callback(output_destination)
+
+    def play_delayed_bot_output_media_stream(self, output_destination):
+        self.delayed_play_source_id = None
+        # Only play if the stream is still meant to go to this destination when the pause is over
+        if not self.cleaned_up and self.url and self.output_destination == output_destination:
+            self.play_bot_output_media_stream(output_destination)
+        # Don't repeat the timeout
+        return False
+
+    # A later update that stops or re-targets the stream supersedes a play that is still waiting to happen
+    def cancel_delayed_play_bot_output_media_stream(self):
+        if self.delayed_play_source_id is not None:
+            GLib.source_remove(self.delayed_play_source_id)
+            self.delayed_play_source_id = None
+
     def cleanup(self):
         try:
             self.send_webpage_streamer_shutdown_request()
         except Exception as e:
             logger.warning(f"Error sending webpage streamer shutdown request: {e}")
         self.cleaned_up = True
+        self.shutdown_event.set()
+        self.cancel_pending_update()
+        self.cancel_delayed_play_bot_output_media_stream()
+        self.session.close()
 
     def streaming_service_hostname(self):
         # If we're running in k8s, the streaming service will be on another pod which is addressable using via a per-pod service
@@ -96,11 +171,11 @@ class WebpageStreamerManager:
 
     def update_webrtc_connection(self, url):
         # Start and update do the same thing, so we can use the same endpoint
-        update_streaming_response = requests.post(f"http://{self.streaming_service_hostname()}:8000/start_streaming", json={"url": url})
-        logger.info(f"Update streaming response: {update_streaming_response}")
+        update_streaming_response = self.session.post(f"{self.streaming_service_base_url}/start_streaming", json={"url": url}, timeout=WEBPAGE_STREAMER_NAVIGATION_REQUEST_TIMEOUT)
+        logger.info("Update streaming response: %s", update_streaming_response)
 
         if update_streaming_response.status_code != 200:
-            logger.info(f"Failed to update streaming. Response: {update_streaming_response.status_code}")
+            logger.info("Failed to update streaming. Response: %s", update_streaming_response.status_code)
             return
 
     def start_or_update_webrtc_connection(self, url):
@@ -114,11 +189,12 @@ class WebpageStreamerManager:
             logger.error(f"Error getting peer connection offer: {peerConnectionOffer.get('error')}, returning")
             return
 
-        offer_response = requests.post(f"http://{self.streaming_service_hostname()}:8000/offer", json={"sdp": peerConnectionOffer["sdp"], "type": peerConnectionOffer["type"]})
-        logger.info(f"Offer response: {offer_response.json()}")
-        self.start_peer_connection_callback(offer_response.json())
+        offer_response = self.session.post(f"{self.streaming_service_base_url}/offer", json={"sdp": peerConnectionOffer["sdp"], "type": peerConnectionOffer["type"]}, timeout=WEBPAGE_STREAMER_NAVIGATION_REQUEST_TIMEOUT)
+        offer_response_data = offer_response.json()
+        logger.info("Offer response: %s", offer_response_data)
+        self.start_peer_connection_callback(offer_response_data)
 
-        start_streaming_response = requests.post(f"http://{self.streaming_service_hostname()}:8000/start_streaming", json={"url": url})
+        start_streaming_response = self.session.post(f"{self.streaming_service_base_url}/start_streaming", json={"url": url}, timeout=WEBPAGE_STREAMER_NAVIGATION_REQUEST_TIMEOUT)
         logger.info(f"Start streaming response: {start_streaming_response}")
 
         if start_streaming_response.status_code != 200:
@@ -131,16 +207,13 @@ class WebpageStreamerManager:
         """Send keepalive requests to the streaming service periodically."""
         while not self.cleaned_up:
             try:
-                if not self.webpage_streamer_connection_can_start:
-                    time.sleep(1)
-                else:
-                    time.sleep(60)  # Wait 60 seconds between keepalive requests if we know it's started
-
-                if self.cleaned_up:
+                # Wait 60 seconds between keepalive requests if we know it's started
+                wait_seconds = 60 if self.webpage_streamer_connection_can_start else 1
+                if self.shutdown_event.wait(timeout=wait_seconds):
                     break
 
-                response = requests.post(f"http://{self.streaming_service_hostname()}:8000/keepalive", json={})
-                logger.info(f"Webpage streamer keepalive response: {response.status_code}")
+                response = self.session.post(f"{self.streaming_service_base_url}/keepalive", json={}, timeout=WEBPAGE_STREAMER_REQUEST_TIMEOUT)
+                logger.info("Webpage streamer keepalive response: %s", response.status_code)
                 if response.status_code == 200 and not self.webpage_streamer_connection_can_start:
                     bot_is_ready_for_webpage_streamer = self.is_bot_ready_for_webpage_streamer_callback()
                     if bot_is_ready_for_webpage_streamer:
@@ -150,15 +223,17 @@ class WebpageStreamerManager:
                     else:
                         logger.info("Webpage streamer has started but bot is not ready for webpage streamer. Not notifying bot controller.")
 
+            except requests.exceptions.Timeout:
+                logger.info("Webpage streamer keepalive timed out")
             except Exception as e:
-                logger.info(f"Failed to send webpage streamer keepalive: {e}")
+                logger.info("Failed to send webpage streamer keepalive: %s", e)
                 # Continue the loop even if a single keepalive fails
 
         logger.info("Webpage streamer keepalive task stopped")
 
     def send_webpage_streamer_shutdown_request(self):
         try:
-            response = requests.post(f"http://{self.streaming_service_hostname()}:8000/shutdown", json={})
+            response = self.session.post(f"{self.streaming_service_base_url}/shutdown", json={}, timeout=WEBPAGE_STREAMER_SHUTDOWN_REQUEST_TIMEOUT)
             logger.info(f"Webpage streamer shutdown response: {response.json()}")
         except Exception as e:
             logger.info(f"Webpage streamer shutdown response: {e}")
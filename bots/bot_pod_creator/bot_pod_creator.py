@@ -1,8 +1,11 @@
+import functools
 import json
 import logging
 import os
-import uuid
-from typing import Dict, Optional
+import secrets
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
 
 import jsonpatch
 from django.conf import settings
@@ -14,47 +17,141 @@ logger = logging.getLogger(__name__)
 
 # fmt: off
 
-def apply_json6902_patch(json_to_patch: dict, patch_str: str) -> dict:
+@functools.cache
+def parse_json6902_patch(patch_str: str) -> Optional[jsonpatch.JsonPatch]:
     """
-    Apply a JSON6902 (RFC 6902) patch to a JSON object.
+    Parse a JSON6902 (RFC 6902) patch string into a JsonPatch, or None if it is invalid.
 
-    Args:
-        json_to_patch: The JSON object to patch
-        patch_str: The JSON6902 patch string
+    The patches come from BOT_POD_SPEC_* environment variables, which don't change while
+    the process runs, so each distinct string is only parsed and compiled once.
     """
-    if not patch_str:
-        return json_to_patch
-
     try:
         patch_ops = json.loads(patch_str)
     except json.JSONDecodeError as e:
         logger.error("patch_str is not valid JSON: %s", e)
-        return json_to_patch
+        return None
 
     if not isinstance(patch_ops, list):
         logger.error(
             "patch_str must be a JSON array of JSON6902 operations; got %r",
             type(patch_ops),
         )
+        return None
+
+    try:
+        return jsonpatch.JsonPatch(patch_ops)
+    except Exception as e:
+        logger.error("Failed to parse patch: %s", e)
+        return None
+
+def apply_json6902_patch(json_to_patch: dict, patch_str: str) -> dict:
+    """
+    Apply a JSON6902 (RFC 6902) patch to a JSON object.
+
+    Args:
+        json_to_patch: The JSON object to patch
+        patch_str: The JSON6902 patch string
+    """
+    if not patch_str:
+        return json_to_patch
+
+    patch = parse_json6902_patch(patch_str)
+    if patch is None:
         return json_to_patch
 
     try:
-        patch = jsonpatch.JsonPatch(patch_ops)
         patched = patch.apply(json_to_patch, in_place=False)
         return patched
     except Exception as e:
         logger.error("Failed to apply patch: %s", e)
         return json_to_patch
 
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+@dataclass(frozen=True)
+class BotPodConfig:
+    """Pod settings taken from the environment, read once per process and shared by every BotPodCreator."""
+
+    persistent_storage_size: str
+    enable_chrome_sandbox: bool
+    webpage_streamer_tmp_size_limit: str
+    webpage_streamer_tmp_medium: str
+    webpage_streamer_shm_size_limit: str
+    webpage_streamer_video_frame_size: str
+    webpage_streaming_cpu_request: str
+    webpage_streaming_memory_request: str
+    webpage_streaming_ephemeral_storage_request: str
+    webpage_streaming_memory_limit: str
+    webpage_streaming_ephemeral_storage_limit: str
+    enable_chrome_sandbox_for_webpage_streamer: str
+    webpage_streamer_video_framerate: str
+    bot_cpu_request: str
+    bot_memory_request: str
+    bot_memory_limit: str
+    bot_ephemeral_storage_request: str
+    bot_pod_config_map_name: str
+    bot_pod_secrets_name: str
+    disable_bot_pod_image_pull_secret: bool
+    bot_pod_image_pull_secret_name: str
+    bot_pod_service_account_name: str
+    webpage_streamer_pod_service_account_name: str
+    use_gke_extended_duration_for_bot_pods: bool
+    using_karpenter: bool
+
+    @classmethod
+    @functools.cache
+    def from_env(cls) -> "BotPodConfig":
+        # A BotPodCreator is built for every launch, and these variables don't change while the process runs
+        return cls(
+            persistent_storage_size=os.getenv("BOT_PERSISTENT_STORAGE_SIZE", "50Gi"),
+            enable_chrome_sandbox=_env_flag("ENABLE_CHROME_SANDBOX"),
+            webpage_streamer_tmp_size_limit=os.getenv("WEBPAGE_STREAMER_TMP_SIZE_LIMIT", "1024Mi"),
+            webpage_streamer_tmp_medium=os.getenv("WEBPAGE_STREAMER_TMP_MEDIUM", ""),  # "" or "Memory" for tmpfs
+            webpage_streamer_shm_size_limit=os.getenv("WEBPAGE_STREAMER_SHM_SIZE_LIMIT", "1024Mi"),
+            webpage_streamer_video_frame_size=os.getenv("WEBPAGE_STREAMER_VIDEO_FRAME_SIZE", "1280x720"),
+            webpage_streaming_cpu_request=os.getenv("WEBPAGE_STREAMING_CPU_REQUEST", "1"),
+            webpage_streaming_memory_request=os.getenv("WEBPAGE_STREAMING_MEMORY_REQUEST", "4Gi"),
+            webpage_streaming_ephemeral_storage_request=os.getenv("WEBPAGE_STREAMING_EPHEMERAL_STORAGE_REQUEST", "0.5Gi"),
+            webpage_streaming_memory_limit=os.getenv("WEBPAGE_STREAMING_MEMORY_LIMIT", "4Gi"),
+            webpage_streaming_ephemeral_storage_limit=os.getenv("WEBPAGE_STREAMING_EPHEMERAL_STORAGE_LIMIT", "0.5Gi"),
+            enable_chrome_sandbox_for_webpage_streamer=os.getenv("ENABLE_CHROME_SANDBOX_FOR_WEBPAGE_STREAMER", "true"),
+            webpage_streamer_video_framerate=os.getenv("WEBPAGE_STREAMER_VIDEO_FRAMERATE", "15"),
+            bot_cpu_request=os.getenv("BOT_CPU_REQUEST", "4"),
+            bot_memory_request=os.getenv("BOT_MEMORY_REQUEST", "4Gi"),
+            bot_memory_limit=os.getenv("BOT_MEMORY_LIMIT", "4Gi"),
+            bot_ephemeral_storage_request=os.getenv("BOT_EPHEMERAL_STORAGE_REQUEST", "10Gi"),
+            bot_pod_config_map_name=os.getenv("BOT_POD_CONFIG_MAP_NAME", "env"),
+            bot_pod_secrets_name=os.getenv("BOT_POD_SECRETS_NAME", "app-secrets"),
+            disable_bot_pod_image_pull_secret=_env_flag("DISABLE_BOT_POD_IMAGE_PULL_SECRET"),
+            bot_pod_image_pull_secret_name=os.getenv("BOT_POD_IMAGE_PULL_SECRET_NAME", "regcred"),
+            bot_pod_service_account_name=os.getenv("BOT_POD_SERVICE_ACCOUNT_NAME", "default"),
+            webpage_streamer_pod_service_account_name=os.getenv("WEBPAGE_STREAMER_POD_SERVICE_ACCOUNT_NAME", "default"),
+            use_gke_extended_duration_for_bot_pods=_env_flag("USE_GKE_EXTENDED_DURATION_FOR_BOT_PODS"),
+            using_karpenter=_env_flag("USING_KARPENTER"),
+        )
+
+_kubernetes_api_client_lock = threading.Lock()
+
+@functools.cache
+def _create_kubernetes_api_client() -> client.ApiClient:
+    try:
+        config.load_incluster_config()
+    except config.ConfigException:
+        config.load_kube_config()
+
+    return client.ApiClient()
+
+def get_kubernetes_api_client() -> client.ApiClient:
+    # A BotPodCreator is built for every launch, so load the config and build the client once per process
+    # and let every creator reuse its connection pool to the API server
+    with _kubernetes_api_client_lock:
+        return _create_kubernetes_api_client()
+
 class BotPodCreator:
     def __init__(self):
-        try:
-            config.load_incluster_config()
-        except config.ConfigException:
-            config.load_kube_config()
-        
-        self.v1 = client.CoreV1Api()
-        self.api_client = client.ApiClient()
+        self.api_client = get_kubernetes_api_client()
+        self.v1 = client.CoreV1Api(self.api_client)
         self.namespace = settings.BOT_POD_NAMESPACE
         self.webpage_streamer_namespace = settings.WEBPAGE_STREAMER_POD_NAMESPACE
         
@@ -70,6 +167,14 @@ class BotPodCreator:
         default_pod_image = f"nduncan{self.app_name}/{self.app_name}"
         self.image = f"{os.getenv('BOT_POD_IMAGE', default_pod_image)}:{self.app_version}"
 
+        self.pod_config = BotPodConfig.from_env()
+
+        # These don't depend on the bot, so build them once and share them between the bot and webpage streamer pods
+        self.pod_tolerations = self.get_pod_tolerations()
+        self.pod_image_pull_secrets = self.get_pod_image_pull_secrets()
+        self.unconfined_seccomp_profile = client.V1SeccompProfile(type="Unconfined")
+        self.runtime_default_seccomp_profile = client.V1SeccompProfile(type="RuntimeDefault")
+
     def get_bot_pod_volumes(self):
         """
         Use a generic ephemeral volume backed by PD so we can exceed
@@ -80,7 +185,7 @@ class BotPodCreator:
         if not self.add_persistent_storage:
             return None
         
-        size = os.getenv("BOT_PERSISTENT_STORAGE_SIZE", "50Gi")
+        size = self.pod_config.persistent_storage_size
 
         pvc_spec = client.V1PersistentVolumeClaimSpec(
             access_modes=["ReadWriteOnce"],
@@ -121,10 +226,10 @@ class BotPodCreator:
 
         # It's annoying but if we want chrome sandboxing, we need to use Unconfined seccomp profile 
         # because chrome with sandboxing needs some syscalls that are not allowed by the default profile
-        if os.getenv("ENABLE_CHROME_SANDBOX", "false").lower() == "true":
-            seccomp_profile = client.V1SeccompProfile(type="Unconfined")
+        if self.pod_config.enable_chrome_sandbox:
+            seccomp_profile = self.unconfined_seccomp_profile
         else:
-            seccomp_profile = client.V1SeccompProfile(type="RuntimeDefault")
+            seccomp_profile = self.runtime_default_seccomp_profile
 
         return client.V1SecurityContext(
                             run_as_non_root=True,
@@ -142,14 +247,14 @@ class BotPodCreator:
                             run_as_group=1000,
                             allow_privilege_escalation=False,
                             capabilities=client.V1Capabilities(drop=["ALL"]),
-                            seccomp_profile=client.V1SeccompProfile(type="Unconfined"),
+                            seccomp_profile=self.unconfined_seccomp_profile,
                             read_only_root_filesystem=True,
                         )
 
     def get_webpage_streamer_volumes(self):
         # Writable /tmp (node-backed by default). Align size with your ephemeral-storage limit.
-        tmp_size = os.getenv("WEBPAGE_STREAMER_TMP_SIZE_LIMIT", "1024Mi")
-        tmp_medium = os.getenv("WEBPAGE_STREAMER_TMP_MEDIUM", "")  # "" or "Memory" for tmpfs
+        tmp_size = self.pod_config.webpage_streamer_tmp_size_limit
+        tmp_medium = self.pod_config.webpage_streamer_tmp_medium
         tmp = client.V1Volume(
             name="tmp",
             empty_dir=client.V1EmptyDirVolumeSource(
@@ -159,7 +264,7 @@ class BotPodCreator:
         )
 
         # Optional: larger shared memory for Chromium (strongly recommended)
-        shm_size = os.getenv("WEBPAGE_STREAMER_SHM_SIZE_LIMIT", "1024Mi")
+        shm_size = self.pod_config.webpage_streamer_shm_size_limit
         dshm = client.V1Volume(
             name="dshm",
             empty_dir=client.V1EmptyDirVolumeSource(
@@ -180,7 +285,7 @@ class BotPodCreator:
         ]
 
     def get_webpage_streamer_container(self):
-        args = ["python", "bots/webpage_streamer/run_webpage_streamer.py", "--video-frame-size", os.getenv("WEBPAGE_STREAMER_VIDEO_FRAME_SIZE", "1280x720")]
+        args = ["python", "bots/webpage_streamer/run_webpage_streamer.py", "--video-frame-size", self.pod_config.webpage_streamer_video_frame_size]
         return client.V1Container(
                 name="webpage-streamer",
                 image=self.image,
@@ -188,28 +293,28 @@ class BotPodCreator:
                 args=args,
                 resources=client.V1ResourceRequirements(
                     requests={
-                        "cpu": os.getenv("WEBPAGE_STREAMING_CPU_REQUEST", "1"),
-                        "memory": os.getenv("WEBPAGE_STREAMING_MEMORY_REQUEST", "4Gi"),
-                        "ephemeral-storage": os.getenv("WEBPAGE_STREAMING_EPHEMERAL_STORAGE_REQUEST", "0.5Gi")
+                        "cpu": self.pod_config.webpage_streaming_cpu_request,
+                        "memory": self.pod_config.webpage_streaming_memory_request,
+                        "ephemeral-storage": self.pod_config.webpage_streaming_ephemeral_storage_request
                     },
                     limits={
-                        "memory": os.getenv("WEBPAGE_STREAMING_MEMORY_LIMIT", "4Gi"),
-                        "ephemeral-storage": os.getenv("WEBPAGE_STREAMING_EPHEMERAL_STORAGE_LIMIT", "0.5Gi")
+                        "memory": self.pod_config.webpage_streaming_memory_limit,
+                        "ephemeral-storage": self.pod_config.webpage_streaming_ephemeral_storage_limit
                     }
                 ),
                 env=[
-                    client.V1EnvVar(name="ENABLE_CHROME_SANDBOX_FOR_WEBPAGE_STREAMER", value=os.getenv("ENABLE_CHROME_SANDBOX_FOR_WEBPAGE_STREAMER", "true")),
-                    client.V1EnvVar(name="WEBPAGE_STREAMER_VIDEO_FRAMERATE", value=os.getenv("WEBPAGE_STREAMER_VIDEO_FRAMERATE", "15")),
+                    client.V1EnvVar(name="ENABLE_CHROME_SANDBOX_FOR_WEBPAGE_STREAMER", value=self.pod_config.enable_chrome_sandbox_for_webpage_streamer),
+                    client.V1EnvVar(name="WEBPAGE_STREAMER_VIDEO_FRAMERATE", value=self.pod_config.webpage_streamer_video_framerate),
                 ],
                 security_context = self.get_webpage_streamer_container_security_context(),
                 volume_mounts=self.get_webpage_streamer_volume_mounts()
             )  
 
     def get_bot_container(self):
-        cpu_request = self.bot_cpu_request or os.getenv("BOT_CPU_REQUEST", "4")
-        memory_request = os.getenv("BOT_MEMORY_REQUEST", "4Gi")
-        memory_limit = os.getenv("BOT_MEMORY_LIMIT", "4Gi")
-        ephemeral_storage_request = os.getenv("BOT_EPHEMERAL_STORAGE_REQUEST", "10Gi")
+        cpu_request = self.bot_cpu_request or self.pod_config.bot_cpu_request
+        memory_request = self.pod_config.bot_memory_request
+        memory_limit = self.pod_config.bot_memory_limit
+        ephemeral_storage_request = self.pod_config.bot_ephemeral_storage_request
 
         args = ["python", "manage.py", "run_bot", "--botid", str(self.bot_id)]
 
@@ -233,12 +338,12 @@ class BotPodCreator:
                             # environment variables for the bot, pull from the same secrets the webserver can access
                             client.V1EnvFromSource(
                                 config_map_ref=client.V1ConfigMapEnvSource(
-                                    name=os.getenv("BOT_POD_CONFIG_MAP_NAME", "env")
+                                    name=self.pod_config.bot_pod_config_map_name
                                 )
                             ),
                             client.V1EnvFromSource(
                                 secret_ref=client.V1SecretEnvSource(
-                                    name=os.getenv("BOT_POD_SECRETS_NAME", "app-secrets")
+                                    name=self.pod_config.bot_pod_secrets_name
                                 )
                             )
                         ],
@@ -264,16 +369,20 @@ class BotPodCreator:
                 ]
 
     def get_pod_image_pull_secrets(self):
-        if os.getenv("DISABLE_BOT_POD_IMAGE_PULL_SECRET", "false").lower() == "true":
+        if self.pod_config.disable_bot_pod_image_pull_secret:
             return []
         
         return [
             client.V1LocalObjectReference(
-                name=os.getenv("BOT_POD_IMAGE_PULL_SECRET_NAME", "regcred")
+                name=self.pod_config.bot_pod_image_pull_secret_name
             )
         ]
 
-    def apply_spec_to_bot_pod(self, bot_pod: client.V1Pod) -> dict:
+    def apply_spec_to_bot_pod(self, bot_pod: client.V1Pod) -> Union[client.V1Pod, dict]:
+        # Without a patch, hand the model straight to the API client, which serializes it itself.
+        # Converting it to a dict here would only walk the whole pod tree a second time.
+        if not self.bot_pod_spec:
+            return bot_pod
         bot_pod_spec_data = self.api_client.sanitize_for_serialization(bot_pod)
         return apply_json6902_patch(bot_pod_spec_data, self.bot_pod_spec)
 
@@ -294,17 +403,17 @@ class BotPodCreator:
             bot_name: Optional name for the bot (will generate if not provided)
         """
         if bot_name is None:
-            bot_name = f"bot-{bot_id}-{uuid.uuid4().hex[:8]}"
+            bot_name = f"bot-{bot_id}-{secrets.token_hex(4)}"
 
         self.bot_id = bot_id
         self.bot_cpu_request = bot_cpu_request
         self.add_persistent_storage = add_persistent_storage
 
-        # Out of caution ensure bot_pod_spec_type is purely alphabetical and all uppercase
-        if not bot_pod_spec_type.isalpha() or not bot_pod_spec_type.isupper():
-            raise ValueError(f"bot_pod_spec_type must be purely alphabetical and all uppercase: {bot_pod_spec_type}")
+        # Only known spec types can be used to build the environment variable name (raises ValueError otherwise).
+        # Use the member name rather than formatting the enum, which renders as "BotPodSpecType.X" on Python 3.11+.
+        bot_pod_spec_type = BotPodSpecType(bot_pod_spec_type)
         # Fetch bot pod spec from environment variable, falling back to default if not defined
-        self.bot_pod_spec = os.getenv(f"BOT_POD_SPEC_{bot_pod_spec_type}") or os.getenv(f"BOT_POD_SPEC_{BotPodSpecType.DEFAULT}")
+        self.bot_pod_spec = os.getenv(f"BOT_POD_SPEC_{bot_pod_spec_type.name}") or os.getenv(f"BOT_POD_SPEC_{BotPodSpecType.DEFAULT.name}")
 
         # Metadata labels matching the deployment
         bot_pod_labels = {
@@ -322,10 +431,10 @@ class BotPodCreator:
         
         # Currently, experimenting with this flag to see if it helps with bot pod evictions
         # It makes the pod take longer to be provisioned, so not enabling by default.
-        if os.getenv("USE_GKE_EXTENDED_DURATION_FOR_BOT_PODS", "false").lower() == "true":
+        if self.pod_config.use_gke_extended_duration_for_bot_pods:
             annotations["cluster-autoscaler.kubernetes.io/safe-to-evict"] = "false"
 
-        if os.getenv("USING_KARPENTER", "false").lower() == "true":
+        if self.pod_config.using_karpenter:
             annotations["karpenter.sh/do-not-disrupt"] = "true"
             annotations["karpenter.sh/do-not-evict"] = "true"
 
@@ -339,11 +448,11 @@ class BotPodCreator:
             spec=client.V1PodSpec(
                 containers=[self.get_bot_container()],
                 security_context=self.get_bot_pod_security_context(),
-                service_account_name=os.getenv("BOT_POD_SERVICE_ACCOUNT_NAME", "default"),
+                service_account_name=self.pod_config.bot_pod_service_account_name,
                 restart_policy="Never",
-                image_pull_secrets=self.get_pod_image_pull_secrets(),
+                image_pull_secrets=self.pod_image_pull_secrets,
                 termination_grace_period_seconds=60,
-                tolerations= self.get_pod_tolerations(),
+                tolerations=self.pod_tolerations,
                 volumes=self.get_bot_pod_volumes(),
             )
         )
@@ -366,11 +475,11 @@ class BotPodCreator:
                 ),
                 spec=client.V1PodSpec(
                     containers=[self.get_webpage_streamer_container()],
-                    service_account_name=os.getenv("WEBPAGE_STREAMER_POD_SERVICE_ACCOUNT_NAME", "default"),
+                    service_account_name=self.pod_config.webpage_streamer_pod_service_account_name,
                     restart_policy="Never",
-                    image_pull_secrets=self.get_pod_image_pull_secrets(),
+                    image_pull_secrets=self.pod_image_pull_secrets,
                     termination_grace_period_seconds=60,
-                    tolerations=self.get_pod_tolerations(),
+                    tolerations=self.pod_tolerations,
                     volumes=self.get_webpage_streamer_volumes(),
                 )
             )
@@ -381,37 +490,9 @@ class BotPodCreator:
                 body=bot_pod_spec_data
             )
 
+            # Only create the webpage streamer once the bot pod exists, so a failed launch leaves nothing behind
             if add_webpage_streamer:
-                webpage_streamer_pod_api_response = self.v1.create_namespaced_pod(
-                    namespace=self.webpage_streamer_namespace,
-                    body=webpage_streamer_pod
-                )
-                logger.info(f"Webpage streamer pod created: {webpage_streamer_pod_api_response}")
-            
-                # This is used so that when the streamer pod is deleted, the service is also deleted
-                owner_ref = client.V1OwnerReference(
-                    api_version="v1",
-                    kind="Pod",
-                    name=webpage_streamer_pod_api_response.metadata.name,
-                    uid=webpage_streamer_pod_api_response.metadata.uid,
-                    controller=False,
-                    block_owner_deletion=False
-                )
-                # This service is used so that the bot pod can make requests to the streamer pod
-                webpage_streamer_pod_service = client.V1Service(
-                    metadata=client.V1ObjectMeta(
-                        name=f"{webpage_streamer_pod_api_response.metadata.name}-service",
-                        namespace=self.webpage_streamer_namespace,
-                        owner_references=[owner_ref],
-                    ),
-                    spec=client.V1ServiceSpec(
-                        # Selector is used to connect the service to the streaming pod
-                        selector={"app": "webpage-streamer", "bot-id": bot_name},
-                        ports=[client.V1ServicePort(name="http", port=8000, target_port=8000)],
-                        type="ClusterIP",
-                    ),
-                )
-                self.v1.create_namespaced_service(self.webpage_streamer_namespace, webpage_streamer_pod_service)
+                self.create_webpage_streamer_pod_and_service(webpage_streamer_pod, bot_name)
 
             return {
                 "name": bot_pod_api_response.metadata.name,
@@ -430,6 +511,38 @@ class BotPodCreator:
                 "error": str(e)
             }
 
+    def create_webpage_streamer_pod_and_service(self, webpage_streamer_pod: client.V1Pod, bot_name: str):
+        webpage_streamer_pod_api_response = self.v1.create_namespaced_pod(
+            namespace=self.webpage_streamer_namespace,
+            body=webpage_streamer_pod
+        )
+        logger.info(f"Webpage streamer pod created: {webpage_streamer_pod_api_response}")
+
+        # This is used so that when the streamer pod is deleted, the service is also deleted
+        owner_ref = client.V1OwnerReference(
+            api_version="v1",
+            kind="Pod",
+            name=webpage_streamer_pod_api_response.metadata.name,
+            uid=webpage_streamer_pod_api_response.metadata.uid,
+            controller=False,
+            block_owner_deletion=False
+        )
+        # This service is used so that the bot pod can make requests to the streamer pod
+        webpage_streamer_pod_service = client.V1Service(
+            metadata=client.V1ObjectMeta(
+                name=f"{webpage_streamer_pod_api_response.metadata.name}-service",
+                namespace=self.webpage_streamer_namespace,
+                owner_references=[owner_ref],
+            ),
+            spec=client.V1ServiceSpec(
+                # Selector is used to connect the service to the streaming pod
+                selector={"app": "webpage-streamer", "bot-id": bot_name},
+                ports=[client.V1ServicePort(name="http", port=8000, target_port=8000)],
+                type="ClusterIP",
+            ),
+        )
+        self.v1.create_namespaced_service(self.webpage_streamer_namespace, webpage_streamer_pod_service)
+
     def delete_bot_pod(self, pod_name: str) -> Dict:
         try:
             self.v1.delete_namespaced_pod(
@@ -2,16 +2,18 @@ import base64
 import html
 import json
 import logging
-import os
+import string
 import tempfile
+import threading
 import uuid
-import xml.etree.ElementTree as ET
 import zlib
 from datetime import timedelta
 from urllib.parse import urlencode
 
 import redis
+from django.conf import settings
 from django.urls import reverse
+from lxml import etree as ET
 from saml2 import BINDING_HTTP_POST
 
 # pysaml2
@@ -25,6 +27,19 @@ from bots.models import Bot, GoogleMeetBotLogin
 logger = logging.getLogger(__name__)
 
 
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+
+def _get_redis_client():
+    """Return a Redis client whose connection pool is shared by every sign-in request in this process."""
+    global _redis_client
+    with _redis_client_lock:
+        if _redis_client is None:
+            _redis_client = redis.Redis.from_url(settings.REDIS_CELERY_URL)
+        return _redis_client
+
+
 def get_google_meet_set_cookie_url(session_id):
     base_url = build_site_url(reverse("bot_sso:google_meet_set_cookie"))
     query_params = urlencode({"session_id": session_id})
@@ -35,14 +50,7 @@ def get_google_meet_set_cookie_url(session_id):
 def create_google_meet_sign_in_session(bot: Bot, google_meet_bot_login: GoogleMeetBotLogin):
     session_id = str(uuid.uuid4())
     redis_key = f"google_meet_sign_in_session:{session_id}"
-    redis_params = {}
-    if os.getenv("DISABLE_REDIS_SSL"): # backward compatibility
-        redis_params["ssl_cert_reqs"] = "none"
-    elif os.getenv("REDIS_SSL_REQUIREMENTS") is not None and os.getenv("REDIS_SSL_REQUIREMENTS") != "":
-        redis_params["ssl_cert_reqs"] = os.getenv("REDIS_SSL_REQUIREMENTS")
-    redis_params_query_string = "&".join([f"{key}={value}" for key, value in redis_params.items()])
-    redis_url = os.getenv("REDIS_URL") + ("?" + redis_params_query_string if redis_params_query_string else "")
-    redis_client = redis.from_url(redis_url)
+    redis_client = _get_redis_client()
     # Save for 30 minutes
     session_data = {
         "bot_object_id": bot.object_id,
@@ -54,14 +62,7 @@ def create_google_meet_sign_in_session(bot: Bot, google_meet_bot_login: GoogleMe
 
 def get_bot_login_for_google_meet_sign_in_session(session_id):
     redis_key = f"google_meet_sign_in_session:{session_id}"
-    redis_params = {}
-    if os.getenv("DISABLE_REDIS_SSL"): # backward compatibility
-        redis_params["ssl_cert_reqs"] = "none"
-    elif os.getenv("REDIS_SSL_REQUIREMENTS") is not None and os.getenv("REDIS_SSL_REQUIREMENTS") != "":
-        redis_params["ssl_cert_reqs"] = os.getenv("REDIS_SSL_REQUIREMENTS")
-    redis_params_query_string = "&".join([f"{key}={value}" for key, value in redis_params.items()])
-    redis_url = os.getenv("REDIS_URL") + ("?" + redis_params_query_string if redis_params_query_string else "")
-    redis_client = redis.from_url(redis_url)
+    redis_client = _get_redis_client()
     session_data_raw = redis_client.get(redis_key)
     if not session_data_raw:
         logger.info(f"No session data found for google_meet_sign_in_session: {session_id}")
@@ -76,14 +77,10 @@ def get_bot_login_for_google_meet_sign_in_session(session_id):
     bot_object_id = session_data.get("bot_object_id")
     google_meet_bot_login_object_id = session_data.get("google_meet_bot_login_object_id")
 
-    bot = Bot.objects.filter(object_id=bot_object_id).first()
-    google_meet_bot_login = GoogleMeetBotLogin.objects.filter(object_id=google_meet_bot_login_object_id, group__project=bot.project).first()
+    # Joining through the project checks that the bot exists and belongs to the same project as the login in one query
+    google_meet_bot_login = GoogleMeetBotLogin.objects.filter(object_id=google_meet_bot_login_object_id, group__project__bots__object_id=bot_object_id).first()
     if not google_meet_bot_login:
-        logger.info(f"No google_meet_bot_login found for google_meet_sign_in_session: {session_id}. Data: {session_data}")
-        return None
-
-    if not bot:
-        logger.info(f"No bot found for google_meet_sign_in_session: {session_id}. Data: {session_data}")
+        logger.info(f"No google_meet_bot_login found for bot in google_meet_sign_in_session: {session_id}. Data: {session_data}")
         return None
 
     return google_meet_bot_login
@@ -99,11 +96,22 @@ NSP = {
     "saml": "urn:oasis:names:tc:SAML:2.0:assertion",
 }
 
+# A real AuthnRequest is a few KB, so refuse to inflate anything larger than this
+MAX_INFLATED_AUTHN_REQUEST_SIZE = 1024 * 1024
+
+# The AuthnRequest comes from the caller, so never expand entities or fetch anything while parsing it
+AUTHN_REQUEST_PARSER = ET.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+
 
 def _inflate_redirect_binding(b64: str) -> bytes:
     """Base64 decode + raw DEFLATE inflate (HTTP-Redirect binding)."""
     raw = base64.b64decode(b64)
-    return zlib.decompress(raw, -15)  # raw DEFLATE stream (wbits=-15)
+    decompressor = zlib.decompressobj(-15)  # raw DEFLATE stream (wbits=-15)
+    xml_bytes = decompressor.decompress(raw, MAX_INFLATED_AUTHN_REQUEST_SIZE)
+    # The stream only ends within the limit if it was complete and small enough
+    if not decompressor.eof:
+        raise ValueError(f"SAMLRequest is truncated or inflates to more than {MAX_INFLATED_AUTHN_REQUEST_SIZE} bytes")
+    return xml_bytes
 
 
 def _parse_authn_request(xml_bytes: bytes):
@@ -115,8 +123,8 @@ def _parse_authn_request(xml_bytes: bytes):
       - protocol_binding (optional)
     """
     try:
-        root = ET.fromstring(xml_bytes)
-    except ET.ParseError as e:
+        root = ET.fromstring(xml_bytes, AUTHN_REQUEST_PARSER)
+    except ET.XMLSyntaxError as e:
         raise ValueError(f"Unable to parse AuthnRequest XML: {e}")
 
     if root.tag != f"{{{NSP['samlp']}}}AuthnRequest":
@@ -189,26 +197,34 @@ def _build_idp_server(sp_entity_id: str, acs_url: str, cert_file: str, key_file:
     return Server(config=IdPConfig().load(conf))
 
 
-def _html_auto_post_form(action_url: str, saml_response_b64: str, relay_state: str | None) -> str:
-    """Return a minimal HTML page that auto-POSTs SAMLResponse (+ RelayState if present) to the ACS."""
-    rs_input = f'<input type="hidden" name="RelayState" value="{html.escape(str(relay_state), quote=True)}"/>' if relay_state is not None else ""
-    return f"""<!DOCTYPE html>
+AUTO_POST_FORM_TEMPLATE = string.Template("""<!DOCTYPE html>
 <html>
   <head>
     <meta charset="utf-8"/>
     <title>SAML Post</title>
   </head>
   <body onload="document.forms[0].submit()">
-    <form method="post" action="{action_url}">
-      <input type="hidden" name="SAMLResponse" value="{saml_response_b64}"/>
-      {rs_input}
+    <form method="post" action="$action_url">
+      <input type="hidden" name="SAMLResponse" value="$saml_response_b64"/>
+      $relay_state_input
       <noscript>
         <p>JavaScript is disabled. Click the button below to continue.</p>
         <button type="submit">Continue</button>
       </noscript>
     </form>
   </body>
-</html>"""
+</html>""")
+
+
+def _html_auto_post_form(action_url: str, saml_response_b64: str, relay_state: str | None) -> str:
+    """Return a minimal HTML page that auto-POSTs SAMLResponse (+ RelayState if present) to the ACS."""
+    rs_input = f'<input type="hidden" name="RelayState" value="{html.escape(str(relay_state), quote=True)}"/>' if relay_state is not None else ""
+    # The ACS URL comes from the AuthnRequest, so escape it like the RelayState
+    return AUTO_POST_FORM_TEMPLATE.substitute(
+        action_url=html.escape(action_url, quote=True),
+        saml_response_b64=saml_response_b64,
+        relay_state_input=rs_input,
+    )
 
 
 def _build_sign_in_saml_response(saml_request_b64: str, email_to_sign_in: str, cert: str, private_key: str) -> str:
@@ -452,7 +452,7 @@ def delete_bot(bot: Bot) -> tuple[bool, dict | None]:
         return False, {"error": f"An error occurred while deleting the bot. Error ID: {error_id}"}
 
 
-def validate_webhook_data(url, triggers, project, bot=None):
+def validate_webhook_data(url, triggers, project, bot=None, pending_urls=()):
     """
     Validates webhook URL and triggers for both project-level and bot-level webhooks.
     Returns error message if validation fails.
@@ -462,6 +462,7 @@ def validate_webhook_data(url, triggers, project, bot=None):
         triggers: List of trigger types as strings
         project: The Project instance
         bot: Optional Bot instance for bot-level webhooks
+        pending_urls: URLs that are about to be created in the same batch but are not saved yet
 
     Returns:
         error_message: None if validation succeeds, otherwise an error message
@@ -480,22 +481,22 @@ def validate_webhook_data(url, triggers, project, bot=None):
     existing_webhook_query = project.webhook_subscriptions.filter(url=url)
     if bot:
         # For bot-level webhooks, check if URL already exists for this bot
-        if existing_webhook_query.filter(bot=bot).exists():
+        if url in pending_urls or existing_webhook_query.filter(bot=bot).exists():
             return "URL already subscribed for this bot"
     else:
         # For project-level webhooks, check if URL already exists for project
-        if existing_webhook_query.filter(bot__isnull=True).exists():
+        if url in pending_urls or existing_webhook_query.filter(bot__isnull=True).exists():
             return "URL already subscribed"
 
     # Webhook limit check
     if bot:
         # For bot-level webhooks, check the limit (only count bot-level webhooks)
-        bot_level_webhooks = WebhookSubscription.objects.filter(project=project, bot=bot).count()
+        bot_level_webhooks = WebhookSubscription.objects.filter(project=project, bot=bot).count() + len(pending_urls)
         if bot_level_webhooks >= 2:
             return "You have reached the maximum number of webhooks for a single bot"
     else:
         # For project-level webhooks, check the limit (only count project-level webhooks)
-        project_level_webhooks = WebhookSubscription.objects.filter(project=project, bot__isnull=True).count()
+        project_level_webhooks = WebhookSubscription.objects.filter(project=project, bot__isnull=True).count() + len(pending_urls)
         if project_level_webhooks >= 2:
             return "You have reached the maximum number of webhooks"
 
@@ -542,6 +543,7 @@ def create_webhook_subscription(url, triggers, project, bot=None):
 def create_webhook_subscriptions(webhook_data_list, project, bot=None):
     """
     Creates multiple webhook subscriptions for a project or bot.
+    All subscriptions are validated first and then inserted with a single query.
 
     Args:
         webhook_data_list: List of webhook data dictionaries with 'url' and 'triggers'
@@ -558,9 +560,29 @@ def create_webhook_subscriptions(webhook_data_list, project, bot=None):
     if not webhook_data_list:
         return
 
-    # Create all webhook subscriptions
+    # Validate every subscription before creating any of them
+    webhook_subscriptions = []
+    pending_urls = []
     for webhook_data in webhook_data_list:
         url = webhook_data.get("url", "")
         triggers = webhook_data.get("triggers", [])
 
-        create_webhook_subscription(url, triggers, project, bot)
+        error = validate_webhook_data(url, triggers, project, bot, pending_urls=pending_urls)
+        if error:
+            raise ValidationError(error)
+
+        webhook_subscription = WebhookSubscription(
+            project=project,
+            bot=bot,
+            url=url,
+            triggers=[WebhookTriggerTypes.api_code_to_trigger_type(trigger) for trigger in triggers],
+        )
+        # bulk_create does not call save(), so we need to set the object_id ourselves
+        webhook_subscription.object_id = WebhookSubscription.generate_object_id()
+        webhook_subscriptions.append(webhook_subscription)
+        pending_urls.append(url)
+
+    # Get or create webhook secret for the project
+    WebhookSecret.objects.get_or_create(project=project)
+
+    WebhookSubscription.objects.bulk_create(webhook_subscriptions)
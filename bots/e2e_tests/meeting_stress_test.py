@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import argparse
 import concurrent.futures
-import json
 import random
+import sched
 import sys
 import time
 from typing import Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ----------------------------
 # Helpers / HTTP
@@ -15,9 +17,15 @@ import requests
 
 
 class AttendeeClient:
-    def __init__(self, base_url: str, api_key: str, timeout=30):
+    def __init__(self, base_url: str, api_key: str, timeout=30, max_connections=10):
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
+        # The session is shared by one thread per bot, so keep a pooled connection for each of them.
+        # Idempotent requests (the polling GETs) are retried with backoff when the server is briefly unavailable.
+        retry = Retry(total=5, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.headers.update(
             {
                 "Authorization": f"Token {api_key}",
@@ -35,7 +43,7 @@ class AttendeeClient:
         payload = {"meeting_url": meeting_url, "bot_name": bot_name, "transcription_settings": {"assembly_ai": {}}}
         if extra:
             payload.update(extra)
-        r = self.session.post(self._url("/api/v1/bots"), data=json.dumps(payload), timeout=self.timeout)
+        r = self.session.post(self._url("/api/v1/bots"), json=payload, timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
@@ -72,7 +80,7 @@ class AttendeeClient:
         json_payload = {"url": video_url}
         url = self._url(f"/api/v1/bots/{bot_id}/output_video")
 
-        r = self.session.post(url, data=json.dumps(json_payload), timeout=self.timeout)
+        r = self.session.post(url, json=json_payload, timeout=self.timeout)
         r.raise_for_status()
 
 
@@ -87,51 +95,68 @@ def state_is_joined_recording(state: str) -> bool:
     return "joined" in s and "record" in s
 
 
-def wait_for_state(client: AttendeeClient, bot_id: str, predicate, desc: str, timeout_s: int, poll_s: float = 2.0) -> Dict:
-    start = time.time()
+def wait_for_state(client: AttendeeClient, bot_id: str, predicate, desc: str, timeout_s: int, poll_s: float = 2.0, max_poll_s: float = 10.0) -> Dict:
+    start = time.monotonic()
     while True:
         bot = client.get_bot(bot_id)
         state = str(bot.get("state", ""))
         if predicate(state, bot):
             return bot
-        if (time.time() - start) > timeout_s:
+        if (time.monotonic() - start) > timeout_s:
             raise TimeoutError(f"Timed out waiting for state '{desc}'. Last state={state!r}")
         time.sleep(poll_s)
+        # Back off gradually, a bot that hasn't changed state yet usually won't for a while
+        poll_s = min(poll_s * 1.25, max_poll_s)
 
 
-def play_videos_for_bot(client: AttendeeClient, bot_id: str, bot_name: str, video_urls_with_durations: List[Tuple[str, float]], end_time: float, verbose: bool) -> None:
+def wait_for_state_for_bots(client: AttendeeClient, bots: List[Tuple[str, str]], predicate, desc: str, timeout_s: int):
     """
-    Continuously plays random videos for a bot until end_time is reached.
-    Each video plays for its duration + 15 seconds buffer before playing the next.
+    Polls every bot concurrently until it reaches the state, so the total wait is bounded by the slowest bot
+    rather than the sum over all bots. Yields (bot_name, timeout_error) as each bot finishes, where
+    timeout_error is None if the bot reached the state.
     """
-    while time.time() < end_time:
-        video_url, duration = random.choice(video_urls_with_durations)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(bots), 1)) as executor:
+        futures = {executor.submit(wait_for_state, client, bot_id, predicate, desc, timeout_s): bot_name for bot_id, bot_name in bots}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except TimeoutError as e:
+                yield futures[future], e
+            else:
+                yield futures[future], None
 
+
+def play_next_video_for_bot(scheduler: sched.scheduler, client: AttendeeClient, bot_id: str, bot_name: str, video_urls_with_durations: List[Tuple[str, float]], end_time: float, verbose: bool) -> None:
+    """
+    Plays a random video for a bot and schedules the next one, until end_time is reached.
+    Each video plays for its duration + 15 seconds buffer before playing the next.
+    """
+    if time.monotonic() >= end_time:
         if verbose:
-            print(f"[{bot_name}] Playing video: {video_url} (duration: {duration}s)")
+            print(f"[{bot_name}] Finished playing videos (time limit reached)")
+        return
 
-        try:
-            client.output_video(bot_id, video_url)
-        except Exception as e:
-            print(f"[{bot_name}] Error playing video: {e}", file=sys.stderr)
-            # Continue trying other videos
-            time.sleep(5)
-            continue
+    video_url, duration = random.choice(video_urls_with_durations)
 
+    if verbose:
+        print(f"[{bot_name}] Playing video: {video_url} (duration: {duration}s)")
+
+    try:
+        client.output_video(bot_id, video_url)
+    except Exception as e:
+        print(f"[{bot_name}] Error playing video: {e}", file=sys.stderr)
+        # Continue trying other videos
+        wait_time = 5
+    else:
         # Wait for video duration + 15 second buffer
         wait_time = duration + 15
-        time_remaining = end_time - time.time()
 
-        # Don't wait longer than remaining time
-        actual_wait = min(wait_time, time_remaining)
+    # Don't wait longer than remaining time
+    actual_wait = max(min(wait_time, end_time - time.monotonic()), 0)
 
-        if actual_wait > 0:
-            if verbose:
-                print(f"[{bot_name}] Waiting {actual_wait:.1f}s before next video")
-            time.sleep(actual_wait)
-
-    if verbose:
-        print(f"[{bot_name}] Finished playing videos (time limit reached)")
+    if verbose and actual_wait > 0:
+        print(f"[{bot_name}] Waiting {actual_wait:.1f}s before next video")
+    scheduler.enter(actual_wait, 0, play_next_video_for_bot, (scheduler, client, bot_id, bot_name, video_urls_with_durations, end_time, verbose))
 
 
 def main():
@@ -166,7 +191,7 @@ def main():
         for url, duration in video_urls_with_durations:
             print(f"  - {url} ({duration}s)")
 
-    client = AttendeeClient(args.base_url, args.api_key)
+    client = AttendeeClient(args.base_url, args.api_key, max_connections=max(args.num_bots, 10))
 
     # 1) Create N bots
     if args.verbose:
@@ -191,33 +216,25 @@ def main():
     def _pred_joined(state: str, bot_obj: Dict) -> bool:
         return state_is_joined_recording(state)
 
-    for bot_id, bot_name in bots:
-        try:
-            wait_for_state(client, bot_id, _pred_joined, "joined_recording", args.join_timeout)
-            if args.verbose:
-                print(f"  {bot_name} joined")
-        except TimeoutError as e:
-            print(f"ERROR: {bot_name} failed to join: {e}", file=sys.stderr)
+    for bot_name, timeout_error in wait_for_state_for_bots(client, bots, _pred_joined, "joined_recording", args.join_timeout):
+        if timeout_error:
+            print(f"ERROR: {bot_name} failed to join: {timeout_error}", file=sys.stderr)
             # Continue with other bots
+        elif args.verbose:
+            print(f"  {bot_name} joined")
 
     # 3) Start video playback for all bots concurrently
     if args.verbose:
         print(f"\nStarting video playback for {len(bots)} bots (duration: {args.meeting_duration}s)...")
 
-    end_time = time.time() + args.meeting_duration
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=args.num_bots) as executor:
-        futures = []
-        for bot_id, bot_name in bots:
-            future = executor.submit(play_videos_for_bot, client, bot_id, bot_name, video_urls_with_durations, end_time, args.verbose)
-            futures.append(future)
+    end_time = time.monotonic() + args.meeting_duration
 
-        # Wait for all video playback to complete
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                print(f"ERROR during video playback: {e}", file=sys.stderr)
+    # Bots spend almost all of their time waiting for a video to finish, so a single scheduler drives all of them
+    # instead of a thread per bot sleeping between videos
+    scheduler = sched.scheduler(time.monotonic, time.sleep)
+    for bot_id, bot_name in bots:
+        scheduler.enter(0, 0, play_next_video_for_bot, (scheduler, client, bot_id, bot_name, video_urls_with_durations, end_time, args.verbose))
+    scheduler.run()
 
     # 4) Tell all bots to leave
     if args.verbose:
@@ -238,13 +255,11 @@ def main():
     def _pred_ended(state: str, bot_obj: Dict) -> bool:
         return (state or "").strip().lower() == "ended"
 
-    for bot_id, bot_name in bots:
-        try:
-            wait_for_state(client, bot_id, _pred_ended, "ended", args.end_timeout)
-            if args.verbose:
-                print(f"  {bot_name} ended")
-        except TimeoutError as e:
-            print(f"WARNING: {bot_name} did not end cleanly: {e}", file=sys.stderr)
+    for bot_name, timeout_error in wait_for_state_for_bots(client, bots, _pred_ended, "ended", args.end_timeout):
+        if timeout_error:
+            print(f"WARNING: {bot_name} did not end cleanly: {timeout_error}", file=sys.stderr)
+        elif args.verbose:
+            print(f"  {bot_name} ended")
 
     if args.verbose:
         print("\n✓ Stress test completed successfully!")
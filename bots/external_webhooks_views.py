@@ -1,21 +1,25 @@
 import json
 import logging
-import os
 from datetime import timedelta
 
 import stripe
+from django.conf import settings
+from django.db.models import F, Q
 from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 
-from .models import CalendarNotificationChannel, ZoomOAuthApp, ZoomOAuthConnection
+from .models import Calendar, CalendarNotificationChannel, ZoomOAuthApp, ZoomOAuthConnection
 from .stripe_utils import process_checkout_session_completed, process_customer_updated, process_payment_intent_succeeded
 from .zoom_oauth_connections_utils import _upsert_zoom_meeting_to_zoom_oauth_connection_mapping, _verify_zoom_webhook_signature, compute_zoom_webhook_validation_response
 
 logger = logging.getLogger(__name__)
 
+# Stripe event types that ExternalWebhookStripeView acts on, all others are acknowledged and ignored
+HANDLED_STRIPE_EVENT_TYPES = frozenset({"checkout.session.completed", "payment_intent.succeeded", "customer.updated"})
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class ExternalWebhookMicrosoftCalendarView(View):
@@ -25,8 +29,6 @@ class ExternalWebhookMicrosoftCalendarView(View):
     """
 
     def post(self, request, *args, **kwargs):
-        logger.info(f"Received Microsoft Calendar webhook event. Headers: {request.headers} Body: {request.body}")
-
         # Handle validation request - Microsoft sends a validationToken parameter
         # when setting up the webhook subscription
         validation_token = request.GET.get("validationToken")
@@ -34,6 +36,14 @@ class ExternalWebhookMicrosoftCalendarView(View):
             logger.info(f"Received Microsoft Calendar webhook validation request with token: {validation_token}")
             return HttpResponse(validation_token, content_type="text/plain", status=200)
 
+        # Anything other than a validation request must have a payload, so don't bother logging or parsing an empty one
+        if not request.body:
+            logger.warning("Received Microsoft Calendar webhook event with an empty payload")
+            return HttpResponse(status=400)
+
+        # Payloads can be large, so let logging format them only if the record is emitted
+        logger.info("Received Microsoft Calendar webhook event. Headers: %s Body: %s", request.headers, request.body)
+
         # Parse the webhook payload
         try:
             body = json.loads(request.body)
@@ -43,30 +53,34 @@ class ExternalWebhookMicrosoftCalendarView(View):
                 logger.warning("No notifications found in Microsoft Calendar webhook payload")
                 return HttpResponse(status=200)
 
-            # Process the first notification
+            subscription_ids = set()
             for notification in notifications:
                 subscription_id = notification.get("subscriptionId")
-
                 if not subscription_id:
                     logger.warning("No subscription ID found in Microsoft Calendar webhook notification")
-                    return HttpResponse(status=200)
+                    continue
+                subscription_ids.add(subscription_id)
 
-                # Look up the calendar notification channel by subscription ID
-                calendar_notification_channel = CalendarNotificationChannel.objects.filter(platform_uuid=subscription_id).first()
-                if not calendar_notification_channel:
-                    logger.warning(f"No calendar notification channel found for subscription ID: {subscription_id}")
-                    # TODO make request to stop the subscription in Microsoft Graph API
-                    return HttpResponse(status=200)
+            # Look up the calendar notification channels for every notification at once
+            calendar_notification_channels = list(CalendarNotificationChannel.objects.filter(platform_uuid__in=subscription_ids).values("id", "platform_uuid", "calendar_id", "calendar__object_id"))
+            for subscription_id in subscription_ids.difference(channel["platform_uuid"] for channel in calendar_notification_channels):
+                logger.warning(f"No calendar notification channel found for subscription ID: {subscription_id}")
+                # TODO make request to stop the subscription in Microsoft Graph API
 
-                # Update the last received timestamp
-                calendar_notification_channel.notification_last_received_at = timezone.now()
-                calendar_notification_channel.save()
+            if not calendar_notification_channels:
+                return HttpResponse(status=200)
+
+            now = timezone.now()
+            # Update the last received timestamp
+            CalendarNotificationChannel.objects.filter(id__in=[channel["id"] for channel in calendar_notification_channels]).update(notification_last_received_at=now, updated_at=now)
 
-                # Request a sync task for the calendar. Don't request immediately to provide debouncing.
-                calendar_notification_channel.calendar.sync_task_requested_at = timezone.now()
-                calendar_notification_channel.calendar.save()
+            # Request a sync task for the calendars. Don't request immediately to provide debouncing.
+            # A queryset update bypasses optimistic locking, so bump the version here. That makes a sync that loaded
+            # the calendar before this request fail to save instead of clearing the sync requested here.
+            Calendar.objects.filter(id__in={channel["calendar_id"] for channel in calendar_notification_channels}).update(sync_task_requested_at=now, updated_at=now, version=F("version") + 1)
 
-                logger.info(f"Requested sync task for calendar {calendar_notification_channel.calendar.object_id}")
+            for channel in calendar_notification_channels:
+                logger.info(f"Requested sync task for calendar {channel['calendar__object_id']}")
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse Microsoft Calendar webhook payload: {e}")
@@ -86,14 +100,18 @@ class ExternalWebhookGoogleCalendarView(View):
     """
 
     def post(self, request, *args, **kwargs):
-        logger.info(f"Received Google Calendar webhook event. Headers: {request.headers}")
         resource_state = request.headers.get("X-Goog-Resource-State")
         # If the resource state is sync, then this is just a notification that the channel is active. We don't need to do anything.
+        # These are the bulk of the traffic on idle channels, so return before logging or touching the database.
         if resource_state == "sync":
-            logger.info("Ignoring Google Calendar webhook event because resource state is sync.")
             return HttpResponse(status=200)
 
         channel_id = request.headers.get("X-Goog-Channel-ID")
+        if not channel_id:
+            logger.warning("Received Google Calendar webhook event without a channel ID")
+            return HttpResponse(status=200)
+
+        logger.info("Received Google Calendar webhook event. Headers: %s", request.headers)
         calendar_notification_channel = CalendarNotificationChannel.objects.filter(platform_uuid=channel_id).first()
         if not calendar_notification_channel:
             logger.warning(f"No calendar notification channel found for channel ID: {channel_id}")
@@ -101,11 +119,12 @@ class ExternalWebhookGoogleCalendarView(View):
             return HttpResponse(status=200)
 
         calendar_notification_channel.notification_last_received_at = timezone.now()
-        calendar_notification_channel.save()
+        calendar_notification_channel.save(update_fields=["notification_last_received_at", "updated_at"])
 
         # Request a sync task for the calendar. Don't request immediately to provide debouncing.
         calendar_notification_channel.calendar.sync_task_requested_at = timezone.now()
-        calendar_notification_channel.calendar.save()
+        # Write the version too, so a sync that loaded the calendar before this request fails to save instead of clearing the sync requested here
+        calendar_notification_channel.calendar.save(update_fields=["sync_task_requested_at", "updated_at", "version"])
 
         logger.info(f"Requested sync task for calendar {calendar_notification_channel.calendar.object_id}")
 
@@ -124,10 +143,11 @@ class ExternalWebhookZoomOAuthAppView(View):
         signature_header = request.META.get("HTTP_X_ZM_SIGNATURE")
         timestamp_header = request.META.get("HTTP_X_ZM_REQUEST_TIMESTAMP")
 
-        logger.info(f"Received Zoom OAuth app webhook event: {request_body}")
+        logger.info("Received Zoom OAuth app webhook event: %s", request_body)
 
         try:
-            zoom_oauth_app = ZoomOAuthApp.objects.get(object_id=object_id)
+            # Only load what's needed to verify the request
+            zoom_oauth_app = ZoomOAuthApp.objects.only("id", "object_id", "_encrypted_data").get(object_id=object_id)
             if not _verify_zoom_webhook_signature(
                 body=request_body,
                 timestamp=timestamp_header,
@@ -136,9 +156,8 @@ class ExternalWebhookZoomOAuthAppView(View):
             ):
                 logger.error(f"Invalid Zoom webhook signature for webhook for zoom oauth app {zoom_oauth_app.object_id}")
                 # Only update if it was more than 5 minutes ago to prevent excessive updates
-                if not zoom_oauth_app.last_unverified_webhook_received_at or zoom_oauth_app.last_unverified_webhook_received_at < timezone.now() - timedelta(minutes=5):
-                    zoom_oauth_app.last_unverified_webhook_received_at = timezone.now()
-                    zoom_oauth_app.save()
+                now = timezone.now()
+                ZoomOAuthApp.objects.filter(Q(last_unverified_webhook_received_at__isnull=True) | Q(last_unverified_webhook_received_at__lt=now - timedelta(minutes=5)), pk=zoom_oauth_app.pk).update(last_unverified_webhook_received_at=now, updated_at=now)
                 return HttpResponse(status=400)
 
             event_json = json.loads(request_body)
@@ -183,14 +202,13 @@ class ExternalWebhookZoomOAuthAppView(View):
                 _upsert_zoom_meeting_to_zoom_oauth_connection_mapping([str(new_object.get("pmi"))], zoom_oauth_connection)
 
             # Only update if it was more than 5 minutes ago to prevent excessive updates
-            if not zoom_oauth_app.last_verified_webhook_received_at or zoom_oauth_app.last_verified_webhook_received_at < timezone.now() - timedelta(minutes=5):
-                zoom_oauth_app.last_verified_webhook_received_at = timezone.now()
-                zoom_oauth_app.save()
+            now = timezone.now()
+            ZoomOAuthApp.objects.filter(Q(last_verified_webhook_received_at__isnull=True) | Q(last_verified_webhook_received_at__lt=now - timedelta(minutes=5)), pk=zoom_oauth_app.pk).update(last_verified_webhook_received_at=now, updated_at=now)
 
             # Handle endpoint.url_validation event type
             if event_type == "endpoint.url_validation":
                 json_response = compute_zoom_webhook_validation_response(event_json.get("payload", {}).get("plainToken"), zoom_oauth_app.webhook_secret)
-                logger.info(f"Received Zoom OAuth app webhook event for endpoint URL validation: {event_json}. Returning JSON response: {json_response}")
+                logger.info("Received Zoom OAuth app webhook event for endpoint URL validation: %s. Returning JSON response: %s", event_json, json_response)
                 return JsonResponse(json_response, status=200)
 
         except ZoomOAuthApp.DoesNotExist:
@@ -219,10 +237,14 @@ class ExternalWebhookStripeView(View):
 
         try:
             # Verify the webhook signature
-            event = stripe.Webhook.construct_event(payload, sig_header, os.getenv("STRIPE_WEBHOOK_SECRET"))
+            event = stripe.Webhook.construct_event(payload, sig_header, settings.STRIPE_WEBHOOK_SECRET)
 
             # Handle different event types
             event_type = event["type"]
+            if event_type not in HANDLED_STRIPE_EVENT_TYPES:
+                logger.info(f"Received Stripe webhook event that we don't handle: {event_type}")
+                return HttpResponse(status=200)
+
             event_data = event["data"]["object"]
 
             logger.info(f"Received Stripe webhook event: {event_type}")
@@ -237,8 +259,6 @@ class ExternalWebhookStripeView(View):
                 # Customer updated
                 event_previous_attributes = event["data"].get("previous_attributes")
                 self._handle_customer_updated(event_data, event_previous_attributes)
-            else:
-                logger.info(f"Received Stripe webhook event that we don't handle: {event_type}")
 
             return HttpResponse(status=200)
 
@@ -256,16 +276,16 @@ class ExternalWebhookStripeView(View):
             return HttpResponse(status=400)
 
     def _handle_checkout_session_completed(self, session):
-        logger.info(f"Received Stripe webhook event for checkout session completed: {session}")
+        logger.info("Received Stripe webhook event for checkout session completed: %s", session)
 
         process_checkout_session_completed(session)
 
     def _handle_payment_intent_succeeded(self, payment_intent):
-        logger.info(f"Received Stripe webhook event for payment intent succeeded: {payment_intent}")
+        logger.info("Received Stripe webhook event for payment intent succeeded: %s", payment_intent)
 
         process_payment_intent_succeeded(payment_intent)
 
     def _handle_customer_updated(self, customer, customer_previous_attributes):
-        logger.info(f"Received Stripe webhook event for customer updated: {customer}")
+        logger.info("Received Stripe webhook event for customer updated: %s", customer)
 
         process_customer_updated(customer, customer_previous_attributes)
@@ -1,18 +1,22 @@
+import concurrent.futures
 import logging
 import signal
 import time
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import connection, models
+from django.db import connection, models, transaction
 from django.utils import timezone
 from kubernetes import client, config
 
 from bots.launch_bot_utils import launch_bot
-from bots.models import Bot, BotEventTypes, BotStates
+from bots.models import Bot, BotEvent, BotEventTypes, BotStates
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of bots re-launched at the same time
+RELAUNCH_MAX_WORKERS = 8
+
 # For dealing with this GKE issue: https://discuss.google.dev/t/gke-autopilot-and-preemted-pods/191410/14
 
 
@@ -57,8 +61,9 @@ class Command(BaseCommand):
             except Exception:
                 logger.exception("Correct failed bot launches cycle failed")
             finally:
-                # Close stale connections so the loop never inherits a dead socket
-                connection.close()
+                # Close the connection if it's broken or older than CONN_MAX_AGE so the loop never inherits a dead
+                # socket, but otherwise reuse it on the next cycle like a request would
+                connection.close_if_unusable_or_obsolete()
 
             # Sleep the *remainder* of the interval, even if work took time T
             elapsed = time.monotonic() - began
@@ -95,6 +100,72 @@ class Command(BaseCommand):
                 return False
             raise
 
+    def lock_bot_in_state(self, bot: Bot, state: int) -> bool:
+        # skip_locked makes a bot that's locked by another instance look missing, so it's skipped rather than waited on
+        return Bot.objects.select_for_update(skip_locked=True).filter(pk=bot.pk, state=state).values_list("pk", flat=True).first() is not None
+
+    def relaunch_non_scheduled_bot(self, bot: Bot):
+        try:
+            pod_name = bot.k8s_pod_name()
+            # Hold the bot's row lock until it's re-launched, so another instance of this daemon can't launch it too
+            with transaction.atomic():
+                if not self.lock_bot_in_state(bot, BotStates.JOINING):
+                    logger.info(f"Bot {bot.object_id} is being re-launched elsewhere or is no longer JOINING, skipping re-launch")
+                    return
+                # Read the pod under the lock, so a pod launched by another instance since this cycle started is seen
+                if self.bot_pod_is_active(pod_name):
+                    logger.info(f"Bot {bot.object_id} already has a pod, skipping re-launch")
+                    return
+                if bot.should_launch_webpage_streamer():
+                    logger.info(f"Bot {bot.object_id} should launch a webpage streamer, skipping re-launch")
+                    return
+                last_bot_event = bot.latest_bot_events[0] if bot.latest_bot_events else None
+                if last_bot_event is None or last_bot_event.event_type != BotEventTypes.JOIN_REQUESTED:
+                    logger.info(f"Bot {bot.object_id} is not in JOINING state, skipping re-launch")
+                    return
+                if last_bot_event.requested_bot_action_taken_at is not None:
+                    logger.info(f"Bot {bot.object_id} has already had a bot action taken, skipping re-launch")
+                    return
+                logger.info(f"Re-launching non-scheduled bot {bot.object_id} that failed to launch")
+                launch_bot(bot)
+        except Exception as e:
+            logger.error(f"Failed to re-launch non-scheduled bot {bot.object_id}: {str(e)}")
+
+    def relaunch_scheduled_bot(self, bot: Bot):
+        try:
+            pod_name = bot.k8s_pod_name()
+            # Hold the bot's row lock until it's re-launched, so another instance of this daemon can't launch it too
+            with transaction.atomic():
+                if not self.lock_bot_in_state(bot, BotStates.STAGED):
+                    logger.info(f"Bot {bot.object_id} is being re-launched elsewhere or is no longer STAGED, skipping re-launch")
+                    return
+                # Read the pod under the lock, so a pod launched by another instance since this cycle started is seen
+                if self.bot_pod_is_active(pod_name):
+                    logger.info(f"Bot {bot.object_id} already has a pod, skipping re-launch")
+                    return
+                if bot.should_launch_webpage_streamer():
+                    logger.info(f"Bot {bot.object_id} should launch a webpage streamer, skipping re-launch")
+                    return
+                last_bot_event = bot.latest_bot_events[0] if bot.latest_bot_events else None
+                if last_bot_event is None or last_bot_event.event_type != BotEventTypes.STAGED:
+                    logger.info(f"Bot {bot.object_id} is not in STAGED state, skipping re-launch")
+                    return
+                logger.info(f"Re-launching scheduled bot {bot.object_id} that failed to launch")
+                launch_bot(bot)
+        except Exception as e:
+            logger.error(f"Failed to re-launch scheduled bot {bot.object_id}: {str(e)}")
+
+    def relaunch_in_worker_thread(self, relaunch, bot: Bot):
+        try:
+            relaunch(bot)
+        finally:
+            # Each worker thread opens its own database connection, so close it instead of leaving it open once the pool exits
+            connection.close()
+
+    def last_bot_event_prefetch(self):
+        # Fetch each bot's latest event with the bots instead of querying for it per bot
+        return models.Prefetch("bot_events", queryset=BotEvent.objects.order_by("-created_at")[:1], to_attr="latest_bot_events")
+
     def _correct_failed_bot_launches(self):
         logger.info("Looking for bots created in last 5 minutes that failed to launch...")
 
@@ -107,51 +178,21 @@ class Command(BaseCommand):
             # - created between 5 minutes and 1 minute ago AND join_at is null
             # - first heartbeat is null (bot pod never ran)
             # - state is joining
-            failed_to_launch_non_scheduled_q_filter = models.Q(created_at__gt=five_minutes_ago, created_at__lt=one_minute_ago, first_heartbeat_timestamp__isnull=True, join_at__isnull=True)
-            problem_non_scheduled_bots = Bot.objects.filter(failed_to_launch_non_scheduled_q_filter).filter(state=BotStates.JOINING)
-
-            failed_to_launch_scheduled_q_filter = models.Q(join_at__gt=five_minutes_ago, join_at__lt=one_minute_ago, first_heartbeat_timestamp__isnull=True, join_at__isnull=False)
-            problem_scheduled_bots = Bot.objects.filter(failed_to_launch_scheduled_q_filter).filter(state=BotStates.STAGED)
-
-            logger.info(f"Found {problem_non_scheduled_bots.count()} non-scheduled and {problem_scheduled_bots.count()} scheduled bots that failed to launch")
-
-            # Re-launch each bot
-            for bot in problem_non_scheduled_bots:
-                try:
-                    if self.bot_pod_is_active(bot.k8s_pod_name()):
-                        logger.info(f"Bot {bot.object_id} already has a pod, skipping re-launch")
-                        continue
-                    if bot.should_launch_webpage_streamer():
-                        logger.info(f"Bot {bot.object_id} should launch a webpage streamer, skipping re-launch")
-                        continue
-                    last_bot_event = bot.last_bot_event()
-                    if last_bot_event.event_type != BotEventTypes.JOIN_REQUESTED:
-                        logger.info(f"Bot {bot.object_id} is not in JOINING state, skipping re-launch")
-                        continue
-                    if last_bot_event.requested_bot_action_taken_at is not None:
-                        logger.info(f"Bot {bot.object_id} has already had a bot action taken, skipping re-launch")
-                        continue
-                    logger.info(f"Re-launching non-scheduled bot {bot.object_id} that failed to launch")
-                    launch_bot(bot)
-                except Exception as e:
-                    logger.error(f"Failed to re-launch non-scheduled bot {bot.object_id}: {str(e)}")
-
-            for bot in problem_scheduled_bots:
-                try:
-                    if self.bot_pod_is_active(bot.k8s_pod_name()):
-                        logger.info(f"Bot {bot.object_id} already has a pod, skipping re-launch")
-                        continue
-                    if bot.should_launch_webpage_streamer():
-                        logger.info(f"Bot {bot.object_id} should launch a webpage streamer, skipping re-launch")
-                        continue
-                    last_bot_event = bot.last_bot_event()
-                    if last_bot_event.event_type != BotEventTypes.STAGED:
-                        logger.info(f"Bot {bot.object_id} is not in STAGED state, skipping re-launch")
-                        continue
-                    logger.info(f"Re-launching scheduled bot {bot.object_id} that failed to launch")
-                    launch_bot(bot)
-                except Exception as e:
-                    logger.error(f"Failed to re-launch scheduled bot {bot.object_id}: {str(e)}")
+            failed_to_launch_non_scheduled_q_filter = models.Q(created_at__gt=five_minutes_ago, created_at__lt=one_minute_ago, first_heartbeat_timestamp__isnull=True, join_at__isnull=True, state=BotStates.JOINING)
+            problem_non_scheduled_bots = list(Bot.objects.filter(failed_to_launch_non_scheduled_q_filter).prefetch_related(self.last_bot_event_prefetch()))
+
+            failed_to_launch_scheduled_q_filter = models.Q(join_at__gt=five_minutes_ago, join_at__lt=one_minute_ago, first_heartbeat_timestamp__isnull=True, join_at__isnull=False, state=BotStates.STAGED)
+            problem_scheduled_bots = list(Bot.objects.filter(failed_to_launch_scheduled_q_filter).prefetch_related(self.last_bot_event_prefetch()))
+
+            logger.info(f"Found {len(problem_non_scheduled_bots)} non-scheduled and {len(problem_scheduled_bots)} scheduled bots that failed to launch")
+
+            # Re-launch each bot. Each re-launch mostly waits on the Kubernetes API, so run them concurrently.
+            # Bots are locked before they're re-launched, so the same bot is never launched twice.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=RELAUNCH_MAX_WORKERS) as executor:
+                for bot in problem_non_scheduled_bots:
+                    executor.submit(self.relaunch_in_worker_thread, self.relaunch_non_scheduled_bot, bot)
+                for bot in problem_scheduled_bots:
+                    executor.submit(self.relaunch_in_worker_thread, self.relaunch_scheduled_bot, bot)
 
             logger.info("Finished re-launching bots that failed to launch")
 
@@ -77,8 +77,9 @@ class Command(BaseCommand):
             except Exception:
                 log.exception("Scheduler cycle failed")
             finally:
-                # Close stale connections so the loop never inherits a dead socket
-                connection.close()
+                # Close the connection if it's broken or older than CONN_MAX_AGE so the loop never inherits a dead
+                # socket, but otherwise reuse it on the next cycle like a request would
+                connection.close_if_unusable_or_obsolete()
 
             # Sleep the *remainder* of the interval, even if work took time T
             elapsed = time.monotonic() - began
@@ -2863,11 +2863,15 @@ class WebhookSubscription(models.Model):
     OBJECT_ID_PREFIX = "webhook_"
     object_id = models.CharField(max_length=32, unique=True, editable=False)
 
+    @classmethod
+    def generate_object_id(cls):
+        # Generate a random 16-character string
+        random_string = "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(16))
+        return f"{cls.OBJECT_ID_PREFIX}{random_string}"
+
     def save(self, *args, **kwargs):
         if not self.object_id:
-            # Generate a random 16-character string
-            random_string = "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(16))
-            self.object_id = f"{self.OBJECT_ID_PREFIX}{random_string}"
+            self.object_id = self.generate_object_id()
         super().save(*args, **kwargs)
 
     url = models.URLField()
@@ -2,7 +2,6 @@ import base64
 import json
 import logging
 import os
-from dataclasses import asdict
 
 from django.conf import settings
 
@@ -18,7 +17,7 @@ from drf_spectacular.utils import (
 )
 from rest_framework import serializers
 
-from .automatic_leave_configuration import AutomaticLeaveConfiguration
+from .automatic_leave_configuration import default_automatic_leave_settings
 from .models import (
     AsyncTranscription,
     AsyncTranscriptionStates,
@@ -1537,7 +1536,7 @@ class CreateBotSerializer(BotValidationMixin, serializers.Serializer):
 
     def validate_automatic_leave_settings(self, value):
         # Set default values if not provided
-        defaults = asdict(AutomaticLeaveConfiguration())
+        defaults = default_automatic_leave_settings()
 
         # Validate that an unexpected key is not provided
         for key in value.keys():
@@ -6,7 +6,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from accounts.models import Organization
-from bots.bots_api_utils import BotCreationSource, build_site_url, create_bot, create_webhook_subscription, validate_bot_concurrency_limit, validate_meeting_url_and_credentials
+from bots.bots_api_utils import BotCreationSource, build_site_url, create_bot, create_webhook_subscription, create_webhook_subscriptions, validate_bot_concurrency_limit, validate_meeting_url_and_credentials
 from bots.calendars_api_utils import create_calendar
 from bots.models import Bot, BotEventManager, BotEventTypes, BotStates, CalendarEvent, CalendarPlatform, Project, TranscriptionProviders, WebhookSubscription, WebhookTriggerTypes, ZoomOAuthApp
 
@@ -472,6 +472,23 @@ class TestCreateWebhookSubscription(TestCase):
         with self.assertRaises(ValidationError):
             create_webhook_subscription("https://example3.com", ["bot.state_change"], self.project)
 
+    def test_create_webhook_subscriptions_in_batch(self):
+        create_webhook_subscriptions([{"url": "https://example1.com", "triggers": ["bot.state_change"]}, {"url": "https://example2.com", "triggers": ["transcript.update"]}], self.project)
+        self.assertEqual(WebhookSubscription.objects.count(), 2)
+        webhook_subscription = WebhookSubscription.objects.get(url="https://example2.com")
+        self.assertEqual(webhook_subscription.triggers, [WebhookTriggerTypes.TRANSCRIPT_UPDATE])
+        self.assertTrue(webhook_subscription.object_id.startswith("webhook_"))
+
+    def test_create_webhook_subscriptions_with_duplicate_url_in_batch(self):
+        with self.assertRaises(ValidationError):
+            create_webhook_subscriptions([{"url": "https://example.com", "triggers": ["bot.state_change"]}, {"url": "https://example.com", "triggers": ["bot.state_change"]}], self.project)
+        self.assertEqual(WebhookSubscription.objects.count(), 0)
+
+    def test_create_webhook_subscriptions_with_too_many_webhooks_in_batch(self):
+        with self.assertRaises(ValidationError):
+            create_webhook_subscriptions([{"url": f"https://example{i}.com", "triggers": ["bot.state_change"]} for i in range(3)], self.project)
+        self.assertEqual(WebhookSubscription.objects.count(), 0)
+
 
 class TestPatchBot(TestCase):
     def setUp(self):
@@ -1,6 +1,7 @@
 import json
 from datetime import timedelta
 
+from concurrency.exceptions import RecordModifiedError
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -156,6 +157,29 @@ class TestGoogleCalendarWebhooks(TestCase):
         other_channel.refresh_from_db()
         self.assertIsNone(other_channel.notification_last_received_at)
 
+    def test_google_webhook_during_sync_is_not_overwritten_by_sync(self):
+        """Test that a sync which loaded the calendar before the webhook can't clear the sync the webhook requested."""
+        # Calendar as loaded by a sync that started before the notification arrived
+        syncing_calendar = Calendar.objects.get(id=self.calendar.id)
+
+        response = self.client.post(
+            self.url,
+            data="",
+            content_type="application/json",
+            HTTP_X_GOOG_CHANNEL_ID="test_channel_123",
+            HTTP_X_GOOG_RESOURCE_STATE="exists",
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        # The sync's save is stale, so it must fail rather than overwrite sync_task_requested_at
+        syncing_calendar.last_attempted_sync_at = timezone.now()
+        with self.assertRaises(RecordModifiedError):
+            syncing_calendar.save()
+
+        self.calendar.refresh_from_db()
+        self.assertIsNotNone(self.calendar.sync_task_requested_at)
+
 
 class TestMicrosoftCalendarWebhooks(TestCase):
     """Test the Microsoft Calendar webhook events."""
@@ -221,6 +245,37 @@ class TestMicrosoftCalendarWebhooks(TestCase):
         self.calendar.refresh_from_db()
         self.assertIsNotNone(self.calendar.sync_task_requested_at)
 
+    def test_microsoft_webhook_during_sync_is_not_overwritten_by_sync(self):
+        """Test that a sync which loaded the calendar before the webhook can't clear the sync the webhook requested."""
+        # Calendar as loaded by a sync that started before the notification arrived
+        syncing_calendar = Calendar.objects.get(id=self.calendar.id)
+
+        payload = {
+            "value": [
+                {
+                    "subscriptionId": "test_subscription_123",
+                    "changeType": "updated",
+                    "resource": "me/events/event_id_123",
+                }
+            ]
+        }
+
+        response = self.client.post(
+            self.url,
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        # The sync's save is stale, so it must fail rather than overwrite sync_task_requested_at
+        syncing_calendar.last_attempted_sync_at = timezone.now()
+        with self.assertRaises(RecordModifiedError):
+            syncing_calendar.save()
+
+        self.calendar.refresh_from_db()
+        self.assertIsNotNone(self.calendar.sync_task_requested_at)
+
     def test_microsoft_webhook_unknown_subscription_id(self):
         """Test Microsoft webhook with unknown subscription ID returns 200 but does nothing."""
         payload = {
@@ -297,6 +352,20 @@ class TestMicrosoftCalendarWebhooks(TestCase):
 
         self.assertEqual(response.status_code, 400)
 
+    def test_microsoft_webhook_empty_payload(self):
+        """Test Microsoft webhook with an empty payload and no validation token."""
+        response = self.client.post(
+            self.url,
+            data="",
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+        # Verify our notification channel was not updated
+        self.notification_channel.refresh_from_db()
+        self.assertIsNone(self.notification_channel.notification_last_received_at)
+
     def test_microsoft_webhook_multiple_notifications(self):
         """Test Microsoft webhook with multiple notifications in payload."""
         # Create another calendar and notification channel
@@ -350,6 +419,41 @@ class TestMicrosoftCalendarWebhooks(TestCase):
         other_calendar.refresh_from_db()
         self.assertIsNotNone(other_calendar.sync_task_requested_at)
 
+    def test_microsoft_webhook_unknown_subscription_id_does_not_block_other_notifications(self):
+        """Test that an unknown or missing subscription ID doesn't stop the other notifications in the payload from being processed."""
+        payload = {
+            "value": [
+                {
+                    "subscriptionId": "unknown_subscription_id",
+                    "changeType": "created",
+                    "resource": "me/events/event_id_1",
+                },
+                {
+                    "changeType": "created",
+                    "resource": "me/events/event_id_2",
+                },
+                {
+                    "subscriptionId": "test_subscription_123",
+                    "changeType": "updated",
+                    "resource": "me/events/event_id_3",
+                },
+            ]
+        }
+
+        response = self.client.post(
+            self.url,
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        self.notification_channel.refresh_from_db()
+        self.assertIsNotNone(self.notification_channel.notification_last_received_at)
+
+        self.calendar.refresh_from_db()
+        self.assertIsNotNone(self.calendar.sync_task_requested_at)
+
     def test_microsoft_webhook_updated_change_type(self):
         """Test Microsoft webhook with 'updated' change type."""
         payload = {
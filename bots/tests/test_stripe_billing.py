@@ -332,6 +332,18 @@ class StripeBillingTestCase(TestCase):
         response = webhook_client.post(reverse("external_webhooks:external-webhook-stripe"), data="invalid json", content_type="application/json", HTTP_STRIPE_SIGNATURE="test_signature")
         self.assertEqual(response.status_code, 400)
 
+    @patch("stripe.Webhook.construct_event")
+    def test_stripe_webhook_unhandled_event_type(self, mock_construct_event):
+        webhook_client = Client(enforce_csrf_checks=False)
+
+        # Unhandled event types are acknowledged without reading the event data
+        mock_construct_event.return_value = {"type": "invoice.created"}
+        initial_transaction_count = CreditTransaction.objects.count()
+
+        response = webhook_client.post(reverse("external_webhooks:external-webhook-stripe"), data=json.dumps({"type": "invoice.created"}), content_type="application/json", HTTP_STRIPE_SIGNATURE="test_signature")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CreditTransaction.objects.count(), initial_transaction_count)
+
     # Tests for ProjectAutopayStripePortalView
     @patch("stripe.Customer.create")
     @patch("stripe.Customer.retrieve")
@@ -67,6 +67,12 @@ class TestWebpageStreamerManagerStreamingServiceHostname(TestCase):
         result = manager.streaming_service_hostname()
         self.assertEqual(result, "k8s-service-hostname")
 
+    @patch.dict(os.environ, {"LAUNCH_BOT_METHOD": "kubernetes"})
+    def test_base_url_is_built_from_hostname_at_init(self):
+        """Test that requests go to the service hostname resolved when the manager is created."""
+        manager = self._create_manager()
+        self.assertEqual(manager.streaming_service_base_url, "http://k8s-service-hostname:8000")
+
     @patch.dict(os.environ, {"LAUNCH_BOT_METHOD": "docker"})
     def test_returns_local_hostname_in_docker(self):
         """Test that streaming_service_hostname returns local hostname in docker."""
@@ -83,7 +89,7 @@ class TestWebpageStreamerManagerStreamingServiceHostname(TestCase):
 
 
 class TestWebpageStreamerManagerUpdate(TestCase):
-    """Tests for the update method."""
+    """Tests for the update and apply_update methods."""
 
     def _create_manager(self):
         """Helper to create a manager with mock callbacks."""
@@ -99,20 +105,20 @@ class TestWebpageStreamerManagerUpdate(TestCase):
         return manager
 
     def test_update_does_nothing_when_connection_cannot_start(self):
-        """Test that update does nothing when webpage_streamer_connection_can_start is False."""
+        """Test that apply_update does nothing when webpage_streamer_connection_can_start is False."""
         manager = self._create_manager()
         manager.webpage_streamer_connection_can_start = False
 
-        manager.update("http://example.com", "webcam")
+        manager.apply_update("http://example.com", "webcam")
 
         # Should not update any values
         self.assertIsNone(manager.url)
         self.assertIsNone(manager.output_destination)
         manager.play_bot_output_media_stream_callback.assert_not_called()
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_update_starts_connection_with_new_url(self, mock_post):
-        """Test that update starts a WebRTC connection when url is set."""
+        """Test that apply_update starts a WebRTC connection when url is set."""
         manager = self._create_manager()
         manager.webpage_streamer_connection_can_start = True
         manager.get_peer_connection_offer_callback.return_value = {"sdp": "test-sdp", "type": "offer"}
@@ -122,30 +128,30 @@ class TestWebpageStreamerManagerUpdate(TestCase):
         mock_response.json.return_value = {"sdp": "answer-sdp", "type": "answer"}
         mock_post.return_value = mock_response
 
-        manager.update("http://example.com", "webcam")
+        manager.apply_update("http://example.com", "webcam")
 
         self.assertEqual(manager.url, "http://example.com")
         self.assertEqual(manager.output_destination, "webcam")
         self.assertEqual(manager.last_non_empty_url, "http://example.com")
         manager.play_bot_output_media_stream_callback.assert_called_once_with("webcam")
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_update_stops_stream_when_url_becomes_empty(self, mock_post):
-        """Test that update stops the media stream when url becomes empty."""
+        """Test that apply_update stops the media stream when url becomes empty."""
         manager = self._create_manager()
         manager.webpage_streamer_connection_can_start = True
         manager.url = "http://example.com"
         manager.output_destination = "webcam"
 
-        manager.update("", "webcam")
+        manager.apply_update("", "webcam")
 
         manager.stop_bot_output_media_stream_callback.assert_called_once()
         self.assertEqual(manager.url, "")
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
-    @patch("bots.bot_controller.webpage_streamer_manager.time.sleep")
-    def test_update_stops_and_replays_when_output_destination_changes(self, mock_sleep, mock_post):
-        """Test that update stops and replays stream when output destination changes."""
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_update_stops_and_replays_when_output_destination_changes(self, mock_glib, mock_post):
+        """Test that apply_update stops and replays stream when output destination changes."""
         manager = self._create_manager()
         manager.webpage_streamer_connection_can_start = True
         manager.webrtc_connection_started = True
@@ -157,13 +163,53 @@ class TestWebpageStreamerManagerUpdate(TestCase):
         mock_response.status_code = 200
         mock_post.return_value = mock_response
 
-        manager.update("http://example.com", "screenshare")
+        manager.apply_update("http://example.com", "screenshare")
 
         manager.stop_bot_output_media_stream_callback.assert_called_once()
+        # Replaying is delayed by a second on the main loop instead of blocking apply_update()
+        manager.play_bot_output_media_stream_callback.assert_not_called()
+        mock_glib.timeout_add.assert_called_once_with(1000, manager.play_delayed_bot_output_media_stream, "screenshare")
+
+        self.assertFalse(manager.play_delayed_bot_output_media_stream("screenshare"))
         manager.play_bot_output_media_stream_callback.assert_called_once_with("screenshare")
-        mock_sleep.assert_called_once_with(1)
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_update_cancels_delayed_replay_when_url_becomes_empty(self, mock_glib, mock_post):
+        """Test that stopping the stream cancels a replay that hasn't happened yet."""
+        manager = self._create_manager()
+        manager.webpage_streamer_connection_can_start = True
+        manager.webrtc_connection_started = True
+        manager.url = "http://example.com"
+        manager.last_non_empty_url = "http://example.com"
+        manager.output_destination = "webcam"
+
+        manager.apply_update("http://example.com", "screenshare")
+        manager.apply_update("", "screenshare")
+
+        mock_glib.source_remove.assert_called_once_with(mock_glib.timeout_add.return_value)
+        self.assertEqual(manager.stop_bot_output_media_stream_callback.call_count, 2)
+        manager.play_bot_output_media_stream_callback.assert_not_called()
+
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_delayed_replay_does_not_play_after_stream_was_stopped(self, mock_glib, mock_post):
+        """Test that a delayed replay that fires after a later stop doesn't play the stream."""
+        manager = self._create_manager()
+        manager.webpage_streamer_connection_can_start = True
+        manager.webrtc_connection_started = True
+        manager.url = "http://example.com"
+        manager.last_non_empty_url = "http://example.com"
+        manager.output_destination = "webcam"
+
+        manager.apply_update("http://example.com", "screenshare")
+        manager.apply_update("", "screenshare")
+
+        # The timeout fires anyway, e.g. because it was already dispatched when it was cancelled
+        self.assertFalse(manager.play_delayed_bot_output_media_stream("screenshare"))
+        manager.play_bot_output_media_stream_callback.assert_not_called()
+
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_update_only_changes_url_without_replaying(self, mock_post):
         """Test that changing only the URL doesn't stop/replay the stream."""
         manager = self._create_manager()
@@ -177,13 +223,55 @@ class TestWebpageStreamerManagerUpdate(TestCase):
         mock_response.status_code = 200
         mock_post.return_value = mock_response
 
-        manager.update("http://example2.com", "webcam")
+        manager.apply_update("http://example2.com", "webcam")
 
         # Should not call play_bot_output_media_stream_callback since output_destination unchanged
         manager.play_bot_output_media_stream_callback.assert_not_called()
         manager.stop_bot_output_media_stream_callback.assert_not_called()
         self.assertEqual(manager.url, "http://example2.com")
 
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_update_only_keeps_latest_pending_state(self, mock_glib):
+        """Test that a burst of update calls is coalesced into the latest requested state."""
+        manager = self._create_manager()
+        manager.webpage_streamer_connection_can_start = True
+
+        manager.update("http://example.com", "webcam")
+        manager.update("http://example2.com", "screenshare")
+
+        self.assertEqual(manager.pending_update, ("http://example2.com", "screenshare"))
+        # Only one timeout is scheduled on the main loop for the whole burst
+        mock_glib.timeout_add.assert_called_once_with(50, manager.apply_pending_update)
+        # Nothing is applied until the timeout fires
+        self.assertIsNone(manager.url)
+        manager.play_bot_output_media_stream_callback.assert_not_called()
+
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_apply_pending_update_applies_latest_pending_state(self, mock_glib):
+        """Test that the scheduled timeout applies the latest pending state once."""
+        manager = self._create_manager()
+        manager.update("http://example.com", "webcam")
+        manager.update("http://example2.com", "screenshare")
+
+        with patch.object(manager, "apply_update") as mock_apply_update:
+            self.assertFalse(manager.apply_pending_update())
+
+        mock_apply_update.assert_called_once_with("http://example2.com", "screenshare")
+        self.assertIsNone(manager.pending_update)
+        self.assertIsNone(manager.pending_update_source_id)
+
+    @patch("bots.bot_controller.webpage_streamer_manager.GLib")
+    def test_cancel_pending_update_drops_scheduled_update(self, mock_glib):
+        """Test that a scheduled update is dropped so it can't call into a cleaned up adapter."""
+        manager = self._create_manager()
+        manager.update("http://example.com", "webcam")
+
+        manager.cancel_pending_update()
+
+        mock_glib.source_remove.assert_called_once_with(mock_glib.timeout_add.return_value)
+        self.assertIsNone(manager.pending_update)
+        self.assertIsNone(manager.pending_update_source_id)
+
 
 class TestWebpageStreamerManagerStartOrUpdateWebrtcConnection(TestCase):
     """Tests for start_or_update_webrtc_connection method."""
@@ -200,7 +288,7 @@ class TestWebpageStreamerManagerStartOrUpdateWebrtcConnection(TestCase):
             webpage_streamer_service_hostname="test-hostname",
         )
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_start_webrtc_connection_success(self, mock_post):
         """Test successful WebRTC connection start."""
         manager = self._create_manager()
@@ -220,7 +308,7 @@ class TestWebpageStreamerManagerStartOrUpdateWebrtcConnection(TestCase):
         manager.start_peer_connection_callback.assert_called_once_with({"sdp": "answer-sdp", "type": "answer"})
         self.assertEqual(mock_post.call_count, 2)
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_start_webrtc_connection_fails_on_offer_error(self, mock_post):
         """Test that WebRTC connection doesn't start when offer has an error."""
         manager = self._create_manager()
@@ -231,7 +319,7 @@ class TestWebpageStreamerManagerStartOrUpdateWebrtcConnection(TestCase):
         self.assertFalse(manager.webrtc_connection_started)
         mock_post.assert_not_called()
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_start_webrtc_connection_fails_on_streaming_error(self, mock_post):
         """Test that webrtc_connection_started stays False when streaming fails."""
         manager = self._create_manager()
@@ -249,7 +337,7 @@ class TestWebpageStreamerManagerStartOrUpdateWebrtcConnection(TestCase):
 
         self.assertFalse(manager.webrtc_connection_started)
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_update_webrtc_connection_when_already_started(self, mock_post):
         """Test that update is called when connection is already started."""
         manager = self._create_manager()
@@ -282,7 +370,7 @@ class TestWebpageStreamerManagerCleanup(TestCase):
             webpage_streamer_service_hostname="test-hostname",
         )
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_cleanup_sends_shutdown_request(self, mock_post):
         """Test that cleanup sends a shutdown request."""
         manager = self._create_manager()
@@ -298,7 +386,7 @@ class TestWebpageStreamerManagerCleanup(TestCase):
         call_args = mock_post.call_args
         self.assertIn("shutdown", call_args[0][0])
 
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
     def test_cleanup_handles_shutdown_exception(self, mock_post):
         """Test that cleanup handles exceptions gracefully."""
         manager = self._create_manager()
@@ -365,9 +453,8 @@ class TestWebpageStreamerManagerKeepalive(TestCase):
             webpage_streamer_service_hostname="test-hostname",
         )
 
-    @patch("bots.bot_controller.webpage_streamer_manager.time.sleep")
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
-    def test_keepalive_sets_connection_can_start_on_success(self, mock_post, mock_sleep):
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    def test_keepalive_sets_connection_can_start_on_success(self, mock_post):
         """Test that keepalive sets webpage_streamer_connection_can_start when service responds."""
         manager = self._create_manager()
 
@@ -375,24 +462,21 @@ class TestWebpageStreamerManagerKeepalive(TestCase):
         mock_response.status_code = 200
         mock_post.return_value = mock_response
 
-        # Make sleep set cleaned_up on the second call to break the loop after first iteration completes
-        sleep_call_count = [0]
-
-        def sleep_side_effect(duration):
-            sleep_call_count[0] += 1
-            if sleep_call_count[0] >= 2:
-                manager.cleaned_up = True
+        # Make the wait report shutdown on the second call to break the loop after first iteration completes
+        wait_call_count = [0]
 
-        mock_sleep.side_effect = sleep_side_effect
+        def wait_side_effect(timeout):
+            wait_call_count[0] += 1
+            return wait_call_count[0] >= 2
 
-        manager.send_webpage_streamer_keepalive_periodically()
+        with patch.object(manager.shutdown_event, "wait", side_effect=wait_side_effect):
+            manager.send_webpage_streamer_keepalive_periodically()
 
         self.assertTrue(manager.webpage_streamer_connection_can_start)
         manager.on_message_that_webpage_streamer_connection_can_start_callback.assert_called_once()
 
-    @patch("bots.bot_controller.webpage_streamer_manager.time.sleep")
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
-    def test_keepalive_does_not_notify_if_bot_not_ready(self, mock_post, mock_sleep):
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    def test_keepalive_does_not_notify_if_bot_not_ready(self, mock_post):
         """Test that keepalive doesn't notify when bot is not ready."""
         manager = self._create_manager()
         manager.is_bot_ready_for_webpage_streamer_callback.return_value = False
@@ -401,24 +485,21 @@ class TestWebpageStreamerManagerKeepalive(TestCase):
         mock_response.status_code = 200
         mock_post.return_value = mock_response
 
-        # Make sleep set cleaned_up on the second call to break the loop after first iteration completes
-        sleep_call_count = [0]
+        # Make the wait report shutdown on the second call to break the loop after first iteration completes
+        wait_call_count = [0]
 
-        def sleep_side_effect(duration):
-            sleep_call_count[0] += 1
-            if sleep_call_count[0] >= 2:
-                manager.cleaned_up = True
+        def wait_side_effect(timeout):
+            wait_call_count[0] += 1
+            return wait_call_count[0] >= 2
 
-        mock_sleep.side_effect = sleep_side_effect
-
-        manager.send_webpage_streamer_keepalive_periodically()
+        with patch.object(manager.shutdown_event, "wait", side_effect=wait_side_effect):
+            manager.send_webpage_streamer_keepalive_periodically()
 
         self.assertFalse(manager.webpage_streamer_connection_can_start)
         manager.on_message_that_webpage_streamer_connection_can_start_callback.assert_not_called()
 
-    @patch("bots.bot_controller.webpage_streamer_manager.time.sleep")
-    @patch("bots.bot_controller.webpage_streamer_manager.requests.post")
-    def test_keepalive_handles_request_exception(self, mock_post, mock_sleep):
+    @patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post")
+    def test_keepalive_handles_request_exception(self, mock_post):
         """Test that keepalive continues after request exception."""
         manager = self._create_manager()
 
@@ -434,20 +515,31 @@ class TestWebpageStreamerManagerKeepalive(TestCase):
 
         mock_post.side_effect = post_side_effect
 
-        # Make sleep set cleaned_up to break the loop after second iteration
-        sleep_call_count = [0]
+        # Make the wait report shutdown to break the loop after the last try
+        wait_call_count = [0]
 
         times_to_try = 3
 
-        def sleep_side_effect(duration):
-            sleep_call_count[0] += 1
-            if sleep_call_count[0] > times_to_try:
-                manager.cleaned_up = True
-
-        mock_sleep.side_effect = sleep_side_effect
+        def wait_side_effect(timeout):
+            wait_call_count[0] += 1
+            return wait_call_count[0] > times_to_try
 
         # Should not raise exception
-        manager.send_webpage_streamer_keepalive_periodically()
+        with patch.object(manager.shutdown_event, "wait", side_effect=wait_side_effect):
+            manager.send_webpage_streamer_keepalive_periodically()
 
-        # Should have tried twice
+        # Should have tried again after the failure
         self.assertEqual(mock_post.call_count, times_to_try)
+
+    def test_cleanup_wakes_keepalive_thread(self):
+        """Test that cleanup stops the keepalive thread without waiting out the keepalive interval."""
+        manager = self._create_manager()
+        manager.webpage_streamer_connection_can_start = True  # Keepalive waits 60 seconds between requests
+
+        with patch("bots.bot_controller.webpage_streamer_manager.requests.Session.post") as mock_post:
+            mock_post.return_value.json.return_value = {"status": "ok"}
+            manager.init()
+            manager.cleanup()
+            manager.keepalive_task.join(timeout=5)
+
+        self.assertFalse(manager.keepalive_task.is_alive())
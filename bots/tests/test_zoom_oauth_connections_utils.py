@@ -14,6 +14,7 @@ from bots.models import (
 from bots.zoom_oauth_connections_utils import (
     ZoomAPIAuthenticationError,
     _handle_zoom_api_authentication_error,
+    _verify_zoom_webhook_signature,
     compute_zoom_webhook_validation_response,
     get_zoom_tokens_via_zoom_oauth_app,
 )
@@ -67,6 +68,35 @@ class TestComputeZoomWebhookValidationResponse(TestCase):
         self.assertNotEqual(result1["encryptedToken"], result2["encryptedToken"])
 
 
+class TestVerifyZoomWebhookSignature(TestCase):
+    """Test the _verify_zoom_webhook_signature function."""
+
+    def _sign(self, body, timestamp, secret):
+        import hashlib
+        import hmac
+
+        return "v0=" + hmac.new(secret.encode("utf-8"), f"v0:{timestamp}:{body}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def test_accepts_valid_signature(self):
+        """Test that a correctly signed body is accepted, including repeated calls with the same secret."""
+        for body in ['{"event": "meeting.created"}', '{"event": "user.updated"}']:
+            signature = self._sign(body, "1700000000", "test_secret")
+            self.assertTrue(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature=signature, secret="test_secret"))
+
+    def test_rejects_invalid_signature(self):
+        """Test that signatures for a different body, timestamp or secret are rejected."""
+        body = '{"event": "meeting.created"}'
+        self.assertFalse(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature=self._sign(body, "1700000000", "other_secret"), secret="test_secret"))
+        self.assertFalse(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature=self._sign(body, "1700000001", "test_secret"), secret="test_secret"))
+        self.assertFalse(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature=self._sign("{}", "1700000000", "test_secret"), secret="test_secret"))
+
+    def test_rejects_missing_or_malformed_signature(self):
+        """Test that a missing or non-ASCII signature header is rejected rather than raising."""
+        body = '{"event": "meeting.created"}'
+        self.assertFalse(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature=None, secret="test_secret"))
+        self.assertFalse(_verify_zoom_webhook_signature(body=body, timestamp="1700000000", signature="v0=\u00e9", secret="test_secret"))
+
+
 class TestHandleZoomApiAuthenticationError(TestCase):
     """Test the _handle_zoom_api_authentication_error function."""
 
@@ -10,6 +10,10 @@ from deepgram import (
 
 logger = logging.getLogger(__name__)
 
+# Audio chunks arrive every 10-20 ms. Coalesce them into websocket messages of at least this many ms of audio,
+# which cuts the number of frames sent without adding noticeable latency.
+SEND_BUFFER_DURATION_MS = 40
+
 
 class DeepgramStreamingTranscriber:
     def __init__(self, *, deepgram_api_key, interim_results, language, model, sample_rate, metadata, callback, redaction_settings=None, replace_settings=None):
@@ -18,6 +22,11 @@ class DeepgramStreamingTranscriber:
 
         self.last_send_time = time.time()
 
+        self.send_buffer = []
+        self.send_buffer_size = 0
+        # 16-bit linear PCM, so 2 bytes per sample
+        self.send_buffer_limit = sample_rate * 2 * SEND_BUFFER_DURATION_MS // 1000
+
         # Create a websocket connection using the DEEPGRAM_API_KEY from environment variables
         self.deepgram = DeepgramClient(deepgram_api_key, config)
 
@@ -53,8 +62,19 @@ class DeepgramStreamingTranscriber:
         self.dg_connection.start(options)
 
     def send(self, data):
-        self.dg_connection.send(data)
+        self.send_buffer.append(data)
+        self.send_buffer_size += len(data)
+        if self.send_buffer_size >= self.send_buffer_limit:
+            self.flush_send_buffer()
         self.last_send_time = time.time()
 
+    def flush_send_buffer(self):
+        if not self.send_buffer:
+            return
+        self.dg_connection.send(b"".join(self.send_buffer))
+        self.send_buffer = []
+        self.send_buffer_size = 0
+
     def finish(self):
+        self.flush_send_buffer()
         self.dg_connection.finish()
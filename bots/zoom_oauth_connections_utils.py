@@ -1,3 +1,4 @@
+import functools
 import hashlib
 import hmac
 import logging
@@ -46,11 +47,21 @@ def client_id_and_secret_is_valid(client_id: str, client_secret: str) -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=256)
+def _zoom_webhook_hmac(secret: str):
+    # Keying an HMAC hashes the secret into its inner and outer pads, so do that once per secret and copy the keyed state for each message
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
 def _verify_zoom_webhook_signature(body: str, timestamp: str, signature: str, secret: str):
     """Verify the Zoom webhook signature."""
-    hmac_hash = hmac.new(secret.encode("utf-8"), f"v0:{timestamp}:{body}".encode("utf-8"), hashlib.sha256).hexdigest()
-    expected_signature = f"v0={hmac_hash}"
-    return expected_signature == signature
+    if not signature:
+        return False
+    signature_hmac = _zoom_webhook_hmac(secret).copy()
+    signature_hmac.update(f"v0:{timestamp}:{body}".encode("utf-8"))
+    expected_signature = f"v0={signature_hmac.hexdigest()}"
+    # Compare in constant time so the signature can't be guessed byte by byte from response timings
+    return hmac.compare_digest(expected_signature.encode("utf-8"), signature.encode("utf-8"))
 
 
 def compute_zoom_webhook_validation_response(plain_token: str, secret_token: str) -> dict:
@@ -72,10 +83,16 @@ def compute_zoom_webhook_validation_response(plain_token: str, secret_token: str
             "encryptedToken": "23a89b634c017e5364a1c8d9c8ea909b60dd5599e2bb04bb1558d9c3a121faa5"
         }
     """
-    # Create HMAC SHA-256 hash with secret_token as salt and plain_token as the string to hash
-    encrypted_token = hmac.new(secret_token.encode("utf-8"), plain_token.encode("utf-8"), hashlib.sha256).hexdigest()
+    return {"plainToken": plain_token, "encryptedToken": _zoom_webhook_encrypted_token(plain_token, secret_token)}
+
 
-    return {"plainToken": plain_token, "encryptedToken": encrypted_token}
+@functools.lru_cache(maxsize=1024)
+def _zoom_webhook_encrypted_token(plain_token: str, secret_token: str) -> str:
+    # Zoom retries a validation request with the same plainToken, so cache the hash rather than the returned dict, which callers could mutate
+    # Create HMAC SHA-256 hash with secret_token as salt and plain_token as the string to hash
+    encrypted_token_hmac = _zoom_webhook_hmac(secret_token).copy()
+    encrypted_token_hmac.update(plain_token.encode("utf-8"))
+    return encrypted_token_hmac.hexdigest()
 
 
 def _raise_if_error_is_authentication_error(e: requests.RequestException):